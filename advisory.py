@@ -0,0 +1,54 @@
+"""
+Batch advisories for cooperatives / extension officers: crop picks plus a fertilizer
+plan for each picked crop, for many plots in one call. Plots that normalize to the
+same inputs are computed once per batch.
+"""
+from backend.crop_predictor import normalize_inputs, recommend_crops
+from backend.fertilizer_recommender import recommend_fertilizers
+
+PLOT_FIELDS = ("soil_color", "previous_crop", "season", "water_availability", "disease_detected")
+
+
+def _plot_error(plot) -> str:
+    """Why a plot cannot be advised on, or None."""
+    if not isinstance(plot, dict):
+        return "Each plot must be a JSON object"
+    for field in PLOT_FIELDS:
+        if plot.get(field) is not None and not isinstance(plot[field], str):
+            return f"{field} must be a string"
+    return None
+
+
+def _plot_key(plot: dict) -> tuple:
+    # The normalization recommend_crops applies, so equal keys give equal answers.
+    # disease_detected is echoed back verbatim, so it is keyed as given.
+    return normalize_inputs(
+        plot.get("soil_color"), plot.get("previous_crop"), plot.get("season"), plot.get("water_availability")
+    ) + (plot.get("disease_detected") or None,)
+
+
+def _advise(key: tuple, fertilizer_memo: dict) -> dict:
+    soil_color, previous_crop, season, water_availability, disease = key
+    result = recommend_crops(soil_color, previous_crop, season, water_availability)
+    plans = []
+    for c in result["recommended_crops"]:
+        fkey = (c["key"], disease)
+        if fkey not in fertilizer_memo:
+            fertilizer_memo[fkey] = recommend_fertilizers(c["key"], disease)
+        plans.append(fertilizer_memo[fkey])
+    result["fertilizer_plans"] = plans
+    return result
+
+
+def iter_advisories(plots):
+    """Yield one advisory per plot, in input order. `plots` may be any iterable (e.g. NDJSON lines)."""
+    memo, fertilizer_memo = {}, {}
+    for i, plot in enumerate(plots):
+        error = _plot_error(plot)
+        if error:
+            yield {"index": i, "error": error}
+            continue
+        key = _plot_key(plot)
+        if key not in memo:
+            memo[key] = _advise(key, fertilizer_memo)
+        yield {"index": i, "id": plot.get("id"), **memo[key]}
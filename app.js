@@ -272,7 +272,9 @@ function sendChatMessage() {
 
 // ---------- i18n ----------
 async function loadI18n(lang) {
-  const res = await fetch(`${API}/i18n/${lang}`);
+  // Versioned URLs are immutable, so the browser cache can serve repeat loads
+  const version = (window.I18N_VERSIONS || {})[lang];
+  const res = await fetch(`${API}/i18n/${lang}` + (version ? `?v=${version}` : ""));
   i18n = await res.json();
   document.querySelectorAll("[data-i18n]").forEach((el) => {
     const key = el.getAttribute("data-i18n");
@@ -327,6 +329,7 @@ document.getElementById("btn-fertilizer").addEventListener("click", async () =>
 });
 
 // ---------- Farmer: Disease detection ----------
+let diseasePreviewUrl = null; // object URL of the last local preview, revoked when replaced
 document.getElementById("btn-disease").addEventListener("click", async () => {
   const input = document.getElementById("disease-image");
   if (!input.files || !input.files[0]) {
@@ -342,18 +345,33 @@ document.getElementById("btn-disease").addEventListener("click", async () => {
   container.querySelector("p.font-medium").textContent = `${data.label || "Result"} (${(data.confidence * 100).toFixed(0)}% confidence)`;
   container.querySelector("p.remedy").textContent = data.remedy || "";
   const imgBox = document.getElementById("disease-sample-img");
-  if (data.uploaded_url) {
-    imgBox.innerHTML = `<img src="${data.uploaded_url}" alt="Uploaded" class="w-full h-full object-cover" />`;
-  } else {
-    loadSampleImage("diseases", imgBox);
+  // Uploads are only kept on the server when it is configured to; otherwise preview the local file
+  if (diseasePreviewUrl) {
+    URL.revokeObjectURL(diseasePreviewUrl);
+    diseasePreviewUrl = null;
+  }
+  let previewUrl = data.uploaded_url;
+  if (!previewUrl) {
+    previewUrl = diseasePreviewUrl = URL.createObjectURL(input.files[0]);
   }
+  imgBox.innerHTML = `<img src="${previewUrl}" alt="Uploaded" class="w-full h-full object-cover" />`;
 });
 
 // ---------- Farmer: Cultivation guide ----------
+// Guides are immutable per crop; the guide and procedure views share one fetch
+const cultivationCache = new Map();
+function fetchCultivation(crop) {
+  if (!cultivationCache.has(crop)) {
+    const req = fetch(`${API}/cultivation/${encodeURIComponent(crop)}`).then((res) => res.json());
+    req.catch(() => cultivationCache.delete(crop));
+    cultivationCache.set(crop, req);
+  }
+  return cultivationCache.get(crop);
+}
+
 document.getElementById("btn-cultivation").addEventListener("click", async () => {
   const crop = document.getElementById("cultivation-crop").value.trim() || "rice";
-  const res = await fetch(`${API}/cultivation/${encodeURIComponent(crop)}`);
-  const data = await res.json();
+  const data = await fetchCultivation(crop);
   const container = document.getElementById("cultivation-result");
   container.classList.remove("hidden");
   document.getElementById("cultivation-steps").innerHTML = (data.steps || []).map(
@@ -419,8 +437,26 @@ document.getElementById("btn-save-seller").addEventListener("click", async () =>
   const data = await res.json();
   currentSellerId = data.id;
   alert("Profile saved. Your ID: " + data.id);
+  watchNotifications(data.id);
 });
 
+// Long-poll the seller's inbox so buyer interest shows up without pressing refresh
+async function watchNotifications(sellerId) {
+  let since = 0;
+  while (currentSellerId === sellerId) {
+    try {
+      const res = await fetch(`${API}/notifications/wait?seller_id=${encodeURIComponent(sellerId)}&since=${since}&timeout=25`);
+      const items = await res.json();
+      if (items.length) {
+        since = items[items.length - 1].seq;
+        loadNotifications();
+      }
+    } catch (_) {
+      await new Promise((resolve) => setTimeout(resolve, 5000));
+    }
+  }
+}
+
 // ---------- Seller: Notifications ----------
 document.getElementById("btn-refresh-notifications").addEventListener("click", loadNotifications);
 
@@ -460,21 +496,19 @@ document.getElementById("btn-match").addEventListener("click", async () => {
   const lat = parseFloat(document.getElementById("match-lat").value) || 28.6;
   const lon = parseFloat(document.getElementById("match-lon").value) || 77.2;
   const buyers = [{ id: "b1", crop_wanted, max_budget, min_quality: 5, location: { lat, lon } }];
-  const sellersRes = await fetch(`${API}/sellers`);
-  const sellers = await sellersRes.json();
-  if (!sellers.length) {
-    document.getElementById("match-result").innerHTML = "<p class='text-stone-500'>No sellers in system. Add seller profile first (as Seller role).</p>";
-    document.getElementById("match-result").classList.remove("hidden");
-    return;
-  }
+  // Sellers are matched server-side from the registered catalogue
   const res = await fetch(`${API}/match`, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ buyers, sellers, max_distance_km: 200 }),
+    body: JSON.stringify({ buyers, max_distance_km: 200 }),
   });
   const data = await res.json();
   const container = document.getElementById("match-result");
   container.classList.remove("hidden");
+  if (data.sellers_indexed === 0) {
+    container.innerHTML = "<p class='text-stone-500'>No sellers in system. Add seller profile first (as Seller role).</p>";
+    return;
+  }
   if (!data.matches || !data.matches.length) {
     container.innerHTML = "<p class='text-stone-500'>No matches found. Try different crop or budget.</p>";
     return;
@@ -523,9 +557,9 @@ document.getElementById("btn-create-delivery")?.addEventListener("click", async
 document.getElementById("btn-track").addEventListener("click", async () => {
   const tid = document.getElementById("tracking-id").value.trim();
   if (!tid) {
-    const res = await fetch(`${API}/delivery`);
-    const list = await res.json();
-    const ids = Array.isArray(list) ? list.map((d) => d.tracking_id).join(", ") : "—";
+    const res = await fetch(`${API}/deliveries?limit=20`);
+    const page = await res.json();
+    const ids = Array.isArray(page.items) ? page.items.map((d) => d.tracking_id).join(", ") : "—";
     alert("Existing tracking IDs: " + (ids || "None. Create one via API or demo."));
     return;
   }
@@ -569,8 +603,7 @@ function loadSampleImagesForRole() {
 let lastProcedureSteps = [];
 document.getElementById("btn-procedure").addEventListener("click", async () => {
   const crop = document.getElementById("procedure-crop").value.trim() || document.getElementById("cultivation-crop").value.trim() || "rice";
-  const res = await fetch(`${API}/cultivation/${encodeURIComponent(crop)}`);
-  const data = await res.json();
+  const data = await fetchCultivation(crop);
   lastProcedureSteps = data.steps || [];
   const container = document.getElementById("procedure-result");
   container.classList.remove("hidden");
@@ -2,9 +2,12 @@
 Agri AI - Flask backend. Run: python app.py
 """
 import os
+import hashlib
 import json
+import math
+import time
 import uuid
-from flask import Flask, request, jsonify, send_from_directory, render_template
+from flask import Blueprint, Flask, Response, current_app, request, jsonify, send_from_directory, render_template, stream_with_context
 from werkzeug.utils import secure_filename
 
 # Add project root to path
@@ -13,141 +16,572 @@ sys_path = os.path.dirname(os.path.abspath(__file__))
 if sys_path not in sys.path:
     sys.path.insert(0, sys_path)
 
-from backend.config import ensure_upload_dir, UPLOAD_FOLDER, ALLOWED_EXTENSIONS, MAX_CONTENT_LENGTH
-from backend.crop_predictor import recommend_crops
-from backend.fertilizer_recommender import recommend_fertilizers
-from backend.disease_predictor import predict_disease_from_image
-from backend.matching import match_buyers_to_sellers
-from backend.cultivation_guide import get_cultivation_steps
-from backend.i18n import get_text, get_all_for_lang
-
-app = Flask(__name__, static_folder="static", template_folder="templates")
-app.config["MAX_CONTENT_LENGTH"] = MAX_CONTENT_LENGTH
-ensure_upload_dir()
-
-# In-memory stores for demo (use DB in production)
-surveys_store = []
-delivery_status_store = {
-    "DEMO001": {
-        "tracking_id": "DEMO001",
-        "status": "in_transit",
-        "stages": [
-            {"name": "Order confirmed", "done": True},
-            {"name": "Dispatched", "done": True},
-            {"name": "In transit", "done": True},
-            {"name": "Delivered", "done": False},
-        ],
-        "origin": "Farm A, Punjab",
-        "destination": "Market, Delhi",
-    }
+from backend.config import (
+    ensure_upload_dir, UPLOAD_FOLDER, ALLOWED_EXTENSIONS, MAX_CONTENT_LENGTH, PERSIST_UPLOADS, DISEASE_BATCH_MAX_FILES,
+    DISEASE_BATCH_MAX_MB, DISEASE_JOB_WORKERS, DISEASE_JOB_QUEUE_SIZE, STORAGE_BACKEND, STORAGE_PATH,
+    DELIVERY_BULK_MAX, PROFILING, ENABLED_FEATURES, RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL, RESPONSE_CACHE_SHARED,
+    MATCH_ALLOCATE_BUDGET_MS,
+)
+from backend.crop_predictor import recommend_crops, normalize_inputs
+from backend.fertilizer_recommender import recommend_fertilizers, normalize_crop
+from backend.disease_predictor import (
+    predict_disease_from_image, predict_disease_or_raise, predict_disease_batch, prediction_cache,
+)
+from backend.matching import match_buyers_to_sellers, iter_top_matches, allocate, SellerCatalogue, BuyerRequestIndex
+from backend.cultivation_guide import get_cultivation_payload
+from backend.i18n import get_text, get_all_for_lang, get_bundle, bundle_versions
+from backend.advisory import iter_advisories
+from backend.jobs import JobQueue, QueueFull
+from backend.notifications import BUYER_ALERT_SCHEMA, BUYER_INTEREST_SCHEMA, NotificationStore
+from backend.storage import RecordStore, open_log
+from backend.surveys import SurveyStore, parse_time
+from backend.deliveries import DeliveryIndex, INDEXED_FIELDS, stages_valid
+from backend.metrics import RequestMetrics, RouteProfiler, init_app as init_metrics
+from backend.response_cache import ResponseCache, TTLCache, SQLiteTier
+
+request_metrics = RequestMetrics()
+route_profiler = RouteProfiler() if PROFILING else None
+response_cache = ResponseCache(
+    TTLCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL),
+    SQLiteTier(RESPONSE_CACHE_SHARED, RESPONSE_CACHE_TTL) if RESPONSE_CACHE_SHARED else None,
+)
+
+# Routes are grouped into feature blueprints; create_app() registers the enabled ones
+core = Blueprint("core", __name__)
+crops = Blueprint("crops", __name__)
+disease = Blueprint("disease", __name__)
+market = Blueprint("market", __name__)
+surveys = Blueprint("surveys", __name__)
+delivery = Blueprint("delivery", __name__)
+FEATURES = {"crops": crops, "disease": disease, "market": market, "surveys": surveys, "delivery": delivery}
+
+# In-memory views of the record log (see backend/storage.py); written only through `store`
+survey_store = SurveyStore()
+surveys_store = survey_store.items
+deliveries = DeliveryIndex()
+delivery_status_store = deliveries.records
+# Seller profiles, indexed by location and crop for /api/match
+seller_catalogue = SellerCatalogue()
+seller_profiles = seller_catalogue.sellers
+# Standing buyer requests, matched against each newly registered seller
+buyer_request_index = BuyerRequestIndex()
+buyer_requests = buyer_request_index.requests
+# Buyer-interest notifications, indexed per seller; new-stock alerts, indexed per buyer
+notification_store = NotificationStore(key="seller_id", schema=BUYER_INTEREST_SCHEMA)
+notifications = notification_store.items
+buyer_alerts = NotificationStore(key="buyer_id", schema=BUYER_ALERT_SCHEMA)
+# Images that cannot be analysed end as failed jobs, not as done ones with an error result
+disease_jobs = JobQueue(predict_disease_or_raise, workers=DISEASE_JOB_WORKERS, max_queued=DISEASE_JOB_QUEUE_SIZE)
+
+store = None  # RecordStore, opened by the first create_app() with a feature that needs it
+
+# Record log tables behind each feature, and how a record is applied to its in-memory view
+FEATURE_TABLES = {
+    "market": ("sellers", "notifications", "buyer_requests", "buyer_alerts"),
+    "surveys": ("surveys",),
+    "delivery": ("deliveries",),
+}
+APPLIERS = {
+    "sellers": lambda key, doc: seller_catalogue.add(doc),
+    "notifications": lambda key, doc: notification_store.add(doc),
+    "buyer_requests": lambda key, doc: buyer_request_index.add(doc),
+    "buyer_alerts": lambda key, doc: buyer_alerts.add(doc),
+    "surveys": lambda key, doc: survey_store.add(doc),
+    "deliveries": lambda key, doc: deliveries.put(key, doc),
 }
-seller_profiles = []
-buyer_requests = []
-notifications = []
+
+
+def open_store(tables):
+    """Open the record log (once per process) and replay `tables` into their in-memory views;
+    records of other tables are skipped, so a worker only pays for the features it serves."""
+    global store
+    appliers = {t: APPLIERS[t] for t in tables}
+    if store is None:
+        store = RecordStore(open_log(STORAGE_BACKEND, STORAGE_PATH), appliers, keyed=("deliveries",))
+        store.sync()
+    else:
+        store.attach(appliers)
+    if "deliveries" in tables and "DEMO001" not in delivery_status_store:
+        store.write("deliveries", {
+            "tracking_id": "DEMO001",
+            "status": "in_transit",
+            "stages": [
+                {"name": "Order confirmed", "done": True},
+                {"name": "Dispatched", "done": True},
+                {"name": "In transit", "done": True},
+                {"name": "Delivered", "done": False},
+            ],
+            "origin": "Farm A, Punjab",
+            "destination": "Market, Delhi",
+        }, key="DEMO001")
+    return store
+
+
+def sync_store():
+    # Pick up records committed by other workers since this one last looked
+    store.sync()
+
+
+# Only the routes backed by the record log sync before each request
+for _blueprint in (market, surveys, delivery):
+    _blueprint.before_request(sync_store)
+
+
+def create_app(features=None):
+    """
+    Build the Flask app with the core routes plus the given feature blueprints
+    (names from FEATURES; default: AGRI_FEATURES, or every feature). A deployment that
+    only serves e.g. matching never loads the disease model's dependencies.
+    """
+    if features is None:
+        features = ENABLED_FEATURES or list(FEATURES)
+    unknown = [f for f in features if f not in FEATURES]
+    if unknown:
+        raise ValueError(f"Unknown features: {', '.join(unknown)} (choose from {', '.join(FEATURES)})")
+    app = Flask(__name__, static_folder="static", template_folder="templates")
+    app.config["MAX_CONTENT_LENGTH"] = MAX_CONTENT_LENGTH
+    app.config["AGRI_FEATURES"] = tuple(features)
+    ensure_upload_dir()
+    init_metrics(app, request_metrics, route_profiler)
+    tables = [t for name in features for t in FEATURE_TABLES.get(name, ())]
+    if tables:
+        open_store(tables)
+    app.register_blueprint(core)
+    for name in features:
+        app.register_blueprint(FEATURES[name])
+    return app
+
+
+def __getattr__(name):
+    # `app` (gunicorn app:app, python app.py) is the full app, built on first access so that
+    # `gunicorn "app:create_app(['market'])"` does not pay for it
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def _precompiled_json(body, etag, cache_control="public, max-age=3600", gzipped=None):
+    """Serve pre-serialized JSON with a strong ETag; If-None-Match hits get 304 without a body.
+    When a precompressed `gzipped` body is given it is sent to clients that accept gzip."""
+    if gzipped is not None and request.accept_encodings["gzip"]:
+        resp = Response(gzipped, mimetype="application/json")
+        resp.headers["Content-Encoding"] = "gzip"
+        etag += "-gz"
+    else:
+        resp = Response(body, mimetype="application/json")
+    if gzipped is not None:
+        resp.vary.add("Accept-Encoding")
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = cache_control
+    return resp.make_conditional(request)
+
+
+def _json_body(obj) -> bytes:
+    # Serialized by the app's JSON provider, so the bytes are what jsonify would send (debug included)
+    return current_app.json.response(obj).get_data()
+
+
+def _etag(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+def _cached_json(key, compute, cache_control):
+    """Serve compute()'s body from the response cache under (this route, key), with an ETag
+    and X-Cache (HIT/MISS) header. `key` must hold the normalized inputs the body depends on."""
+    body, source = response_cache.get_or_compute(request.url_rule.rule, key, compute)
+    resp = _precompiled_json(body, _etag(body), cache_control)
+    resp.headers["X-Cache"] = "MISS" if source == "miss" else "HIT"
+    return resp
+
+
 # ---------- Pages ----------
-@app.route("/")
+@core.route("/")
 def index():
-    return render_template("index.html")
+    return render_template("index.html", i18n_versions=bundle_versions())
 
 
 # ---------- API: Role & i18n ----------
-@app.route("/api/i18n/<lang>", methods=["GET"])
+@core.route("/api/i18n/<lang>", methods=["GET"])
 def api_i18n(lang):
-    return jsonify(get_all_for_lang(lang))
+    """Pre-serialized bundle. With ?v=<version> (see index.html) it may be cached for a year;
+    otherwise clients revalidate with the ETag."""
+    bundle = get_bundle(lang)
+    if request.args.get("v") == bundle["version"]:
+        cache_control = "public, max-age=31536000, immutable"
+    else:
+        cache_control = "no-cache"
+    return _precompiled_json(bundle["body"], bundle["version"], cache_control, gzipped=bundle["gzip"])
 
 
 # ---------- API: Crop prediction ----------
-@app.route("/api/predict-crop", methods=["POST"])
+@crops.route("/api/predict-crop", methods=["POST"])
 def api_predict_crop():
     data = request.get_json() or {}
-    result = recommend_crops(
-        soil_color=data.get("soil_color"),
-        previous_crop=data.get("previous_crop"),
-        season=data.get("season"),
-        water_availability=data.get("water_availability"),
-    )
-    return jsonify(result)
+    inputs = (data.get("soil_color"), data.get("previous_crop"), data.get("season"), data.get("water_availability"))
+    return _cached_json(normalize_inputs(*inputs), lambda: _json_body(recommend_crops(*inputs)), "no-store")
 
 
 # ---------- API: Fertilizer ----------
-@app.route("/api/fertilizer", methods=["POST"])
+_ECHOED = {"crop": "\0crop\0", "disease_considered": "\0disease\0"}  # placeholders in cached bodies
+
+
+@crops.route("/api/fertilizer", methods=["POST"])
 def api_fertilizer():
     data = request.get_json() or {}
-    result = recommend_fertilizers(
-        crop=data.get("crop"),
-        disease_detected=data.get("disease_detected"),
-    )
-    return jsonify(result)
+    crop, disease_detected = data.get("crop"), data.get("disease_detected")
+    key = (normalize_crop(crop), normalize_crop(disease_detected) if disease_detected else None)
+
+    def fertilizer_template():
+        result = recommend_fertilizers(crop=crop, disease_detected=disease_detected)
+        return _json_body({**{k: result[k] for k in ("base_fertilizers", "corrective_fertilizers")}, **_ECHOED})
+
+    # The response echoes the raw inputs, so the cached body holds placeholders for them. A string
+    # (or null) serializes the same wherever it sits, so it is substituted into the bytes directly.
+    template, source = response_cache.get_or_compute(request.url_rule.rule, key, fertilizer_template)
+    echoed = {"crop": crop, "disease_considered": disease_detected or "None"}
+    if all(v is None or isinstance(v, str) for v in echoed.values()):
+        body = template
+        for name, value in echoed.items():
+            body = body.replace(current_app.json.dumps(_ECHOED[name]).encode(), current_app.json.dumps(value).encode())
+    else:
+        body = _json_body({**json.loads(template), **echoed})
+    resp = _precompiled_json(body, _etag(body), "no-store")
+    resp.headers["X-Cache"] = "MISS" if source == "miss" else "HIT"
+    return resp
+
+
+# ---------- API: Batch crop + fertilizer advisories ----------
+@crops.route("/api/advisory/batch", methods=["POST"])
+def api_advisory_batch():
+    """Plots as a JSON array (or {"plots": [...]}) -> {"results": [...]}, or as NDJSON
+    (Content-Type application/x-ndjson) -> NDJSON, one advisory per input line."""
+    if request.mimetype == "application/x-ndjson":
+        def parse_lines():
+            for line in request.stream:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        yield None
+
+        def generate():
+            for adv in iter_advisories(parse_lines()):
+                yield json.dumps(adv) + "\n"
+
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    data = request.get_json(silent=True)
+    plots = data.get("plots") if isinstance(data, dict) else data
+    if not isinstance(plots, list):
+        return jsonify({"error": "Expected a JSON array of plots"}), 400
+    return jsonify({"results": list(iter_advisories(plots))})
 
 
 # ---------- API: Disease from image ----------
-@app.route("/api/disease-predict", methods=["POST"])
+@disease.route("/api/disease-predict", methods=["POST"])
 def api_disease_predict():
     if "image" not in request.files:
         return jsonify({"error": "No image file"}), 400
     f = request.files["image"]
     if not f.filename or not allowed_file(f.filename):
         return jsonify({"error": "Invalid image type"}), 400
-    filename = secure_filename(f"{uuid.uuid4().hex}_{f.filename}")
-    path = os.path.join(UPLOAD_FOLDER, filename)
-    f.save(path)
-    try:
-        result = predict_disease_from_image(path)
+    # Decode straight from the request buffer; only touch the disk if uploads are kept
+    data = f.read()
+    result = predict_disease_from_image(data)
+    if PERSIST_UPLOADS and data:
+        filename = secure_filename(f"{uuid.uuid4().hex}_{f.filename}")
+        with open(os.path.join(UPLOAD_FOLDER, filename), "wb") as out:
+            out.write(data)
         result["uploaded_url"] = f"/static/uploads/{filename}"
-        return jsonify(result)
-    finally:
-        if os.path.isfile(path):
-            try:
-                os.remove(path)
-            except Exception:
-                pass
+    return jsonify(result)
+
+
+@disease.route("/api/disease-predict/batch", methods=["POST"])
+def api_disease_predict_batch():
+    """Many images in one multipart request (field "images"); results come back in upload order."""
+    # The app-wide MAX_CONTENT_LENGTH is sized for one photo; a batch gets its own cap
+    request.max_content_length = DISEASE_BATCH_MAX_MB * 1024 * 1024
+    files = request.files.getlist("images")
+    if not files:
+        return jsonify({"error": "No image files"}), 400
+    if len(files) > DISEASE_BATCH_MAX_FILES:
+        return jsonify({"error": f"At most {DISEASE_BATCH_MAX_FILES} images per batch"}), 413
+    results = [None] * len(files)
+    valid = []
+    for i, f in enumerate(files):
+        if not f.filename or not allowed_file(f.filename):
+            results[i] = {"index": i, "filename": f.filename, "error": "Invalid image type"}
+        else:
+            valid.append((i, f))
+    # Uploads are spooled by werkzeug; the predictor reads them one at a time
+    predictions = predict_disease_batch([f for _, f in valid])
+    for (i, f), pred in zip(valid, predictions):
+        if pred["prediction"] == "error":
+            results[i] = {"index": i, "filename": f.filename, "error": pred["remedy"]}
+        else:
+            results[i] = {"index": i, "filename": f.filename, **pred}
+    return jsonify({"results": results})
+
+
+@disease.route("/api/disease-predict/cache", methods=["GET", "DELETE"])
+def api_disease_cache():
+    if request.method == "DELETE":
+        prediction_cache.invalidate()
+    return jsonify(prediction_cache.stats())
+
+
+# ---------- API: Disease analysis jobs (submit, then poll or stream) ----------
+@disease.route("/api/disease-jobs", methods=["POST"])
+def api_disease_job_submit():
+    if "image" not in request.files:
+        return jsonify({"error": "No image file"}), 400
+    f = request.files["image"]
+    if not f.filename or not allowed_file(f.filename):
+        return jsonify({"error": "Invalid image type"}), 400
+    try:
+        job = disease_jobs.submit(f.read())
+    except QueueFull:
+        resp = jsonify({"error": "Analysis queue is full, retry shortly", **disease_jobs.metrics()})
+        resp.headers["Retry-After"] = "2"
+        return resp, 429
+    jid = job["job_id"]
+    return jsonify({
+        "job_id": jid,
+        "status": job["status"],
+        "status_url": f"/api/disease-jobs/{jid}",
+        "events_url": f"/api/disease-jobs/{jid}/events",
+    }), 202
+
+
+@disease.route("/api/disease-jobs/metrics", methods=["GET"])
+def api_disease_job_metrics():
+    return jsonify(disease_jobs.metrics())
+
+
+@disease.route("/api/disease-jobs/<job_id>", methods=["GET"])
+def api_disease_job_status(job_id):
+    job = disease_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job)
+
+
+@disease.route("/api/disease-jobs/<job_id>/events", methods=["GET"])
+def api_disease_job_events(job_id):
+    """Server-sent events: one "status" event per state change until the job finishes."""
+    job = disease_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+
+    def generate(job):
+        while True:
+            yield f"event: status\ndata: {json.dumps(job)}\n\n"
+            if job["status"] in ("done", "failed"):
+                return
+            seen = job["status"]
+            job = disease_jobs.wait(job_id, seen)
+            while job is not None and job["status"] == seen:
+                yield ": keep-alive\n\n"
+                job = disease_jobs.wait(job_id, seen)
+            if job is None:
+                return
+
+    return Response(generate(job), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 
 # ---------- API: Cultivation steps ----------
-@app.route("/api/cultivation/<crop_key>", methods=["GET"])
+@crops.route("/api/cultivation/<crop_key>", methods=["GET"])
 def api_cultivation(crop_key):
-    steps = get_cultivation_steps(crop_key)
-    return jsonify({"crop": crop_key, "steps": steps})
+    # The body echoes crop_key as given, so the raw value is part of the key
+    lang = request.args.get("lang", "en")
+    # The precompiled body is compact; re-serialize it (once per cache miss) as jsonify would
+    return _cached_json((crop_key, lang), lambda: _json_body(json.loads(get_cultivation_payload(crop_key, lang)[0])),
+                        "public, max-age=3600")
 
 
 # ---------- API: Buyer-Seller matching ----------
-@app.route("/api/match", methods=["POST"])
+@market.route("/api/match", methods=["POST"])
 def api_match():
     data = request.get_json() or {}
     buyers = data.get("buyers", [])
-    sellers = data.get("sellers", [])
+    # Without an explicit seller list, match against the server's catalogue
+    sellers = data.get("sellers")
+    if sellers is None:
+        sellers = seller_catalogue
     max_dist = float(data.get("max_distance_km", 200))
-    from backend.matching import match_buyers_to_sellers
+    if data.get("mode") == "allocate":
+        return _allocate_matches(data, buyers, sellers, max_dist)
+    if data.get("top_k") is not None:
+        return _stream_top_matches(data, buyers, sellers, max_dist)
     matches = match_buyers_to_sellers(buyers, sellers, max_dist)
+    if sellers is seller_catalogue:
+        return jsonify({"matches": matches, "sellers_indexed": len(seller_catalogue)})
     return jsonify({"matches": matches})
 
 
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _allocate_matches(data, buyers, sellers, max_dist):
+    """mode=allocate: share each offer's quantity across all buyers (optional quantity_wanted
+    per buyer) within `time_budget_ms`. Returns allocations plus solver time and pruning counts."""
+    try:
+        budget_ms = float(data.get("time_budget_ms", MATCH_ALLOCATE_BUDGET_MS))
+    except (TypeError, ValueError):
+        return jsonify({"error": "time_budget_ms must be a number"}), 400
+    if budget_ms <= 0:
+        return jsonify({"error": "time_budget_ms must be > 0"}), 400
+    result = allocate(buyers, sellers, max_dist, budget_ms / 1000)
+    if sellers is seller_catalogue:
+        result["sellers_indexed"] = len(seller_catalogue)
+    return jsonify(result)
+
+
+def _stream_top_matches(data, buyers, sellers, max_dist):
+    """NDJSON: best top_k matches per buyer, one match per line, then a {"next_cursor"} line.
+    `cursor` is the buyer position to resume from; `limit` caps buyers per response."""
+    try:
+        top_k = int(data.get("top_k"))
+        start = int(data.get("cursor") or 0)
+        limit = int(data["limit"]) if data.get("limit") is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "top_k, cursor and limit must be integers"}), 400
+    if top_k < 1 or start < 0 or (limit is not None and limit < 1):
+        return jsonify({"error": "top_k and limit must be >= 1, cursor >= 0"}), 400
+    end = len(buyers) if limit is None else min(len(buyers), start + limit)
+
+    def generate():
+        for _, matches in iter_top_matches(buyers[:end], sellers, max_dist, top_k, start):
+            for m in matches:
+                yield json.dumps(m) + "\n"
+        yield json.dumps({"next_cursor": end if end < len(buyers) else None}) + "\n"
+
+    return Response(generate(), mimetype="application/x-ndjson")
+
+
 # ---------- API: Seller profiles & crop quantity ----------
-@app.route("/api/sellers", methods=["GET", "POST"])
+@market.route("/api/sellers", methods=["GET", "POST"])
 def api_sellers():
-    global seller_profiles
     if request.method == "POST":
         body = request.get_json() or {}
-        seller_profiles.append({
+        error = _seller_error(body)
+        if error:
+            return jsonify({"error": error}), 400
+        profile = {
             "id": str(uuid.uuid4()),
             "name": body.get("name", "Seller"),
             "location": body.get("location", {"lat": 0, "lon": 0}),
             "crops": body.get("crops", []),
-        })
-        return jsonify(seller_profiles[-1])
-    return jsonify(seller_profiles)
+        }
+        store.write("sellers", profile)
+        _alert_buyers(profile)
+        return jsonify(profile)
+    return jsonify(list(seller_profiles))
+
+
+def _seller_error(body):
+    """Why a POST /api/sellers body cannot be stored, or None. Records are replayed into the
+    catalogue on every start, so malformed profiles are rejected here rather than stored."""
+    if not isinstance(body, dict):
+        return "body must be a JSON object"
+    if not isinstance(body.get("name", "Seller"), str):
+        return "name must be a string"
+    loc = body.get("location", {"lat": 0, "lon": 0})
+    if not (isinstance(loc, dict) and _is_number(loc.get("lat")) and _is_number(loc.get("lon"))):
+        return "location must be {\"lat\": number, \"lon\": number}"
+    crops = body.get("crops", [])
+    if not isinstance(crops, list):
+        return "crops must be a list"
+    for i, offer in enumerate(crops):
+        if not isinstance(offer, dict) or not isinstance(offer.get("name", ""), str):
+            return f"crops[{i}] must be an object with a string name"
+        for field in ("quantity", "unit_price", "quality_score"):
+            if offer.get(field) is not None and not _is_number(offer[field]):
+                return f"crops[{i}].{field} must be a number"
+    return None
+
+
+def _alert_buyers(profile):
+    """Score the new seller against the standing requests it can affect and alert those buyers."""
+    alerts = [
+        {
+            "id": str(uuid.uuid4()),
+            "buyer_id": req.get("buyer_id"),
+            "request_id": req.get("id"),
+            "seller_id": profile["id"],
+            "seller_name": profile["name"],
+            "matches": matches,
+            "read": False,
+        }
+        for req, matches in buyer_request_index.match_seller(profile)
+    ]
+    if alerts:
+        store.write_many(("buyer_alerts", None, a) for a in alerts)
+
+
+# ---------- API: Standing buyer requests & new-stock alerts ----------
+@market.route("/api/buyer-requests", methods=["GET", "POST"])
+def api_buyer_requests():
+    """POST registers a standing request (same fields as a /api/match buyer, plus optional
+    max_distance_km) and returns it with the current matches; later sellers that match it
+    raise an alert for buyer_id. GET lists requests, optionally for one `buyer_id`."""
+    if request.method == "POST":
+        body = request.get_json() or {}
+        error = _buyer_request_error(body)
+        if error:
+            return jsonify({"error": error}), 400
+        req = {
+            "id": str(uuid.uuid4()),
+            "buyer_id": body["buyer_id"],
+            "crop_wanted": body.get("crop_wanted", ""),
+            "location": body.get("location", {"lat": 0, "lon": 0}),
+            "max_budget": body.get("max_budget"),
+            "min_quality": body.get("min_quality"),
+            "max_distance_km": body.get("max_distance_km"),
+        }
+        store.write("buyer_requests", req)
+        max_dist = buyer_request_index.radius(req)
+        buyer = {**req, "id": req["buyer_id"]}
+        return jsonify({"request": req, "matches": match_buyers_to_sellers([buyer], seller_catalogue, max_dist)})
+    buyer_id = request.args.get("buyer_id")
+    return jsonify([r for r in buyer_requests if not buyer_id or r.get("buyer_id") == buyer_id])
+
+
+def _buyer_request_error(body):
+    """Why a POST /api/buyer-requests body cannot be stored, or None (requests are replayed
+    into the index on every start, like seller profiles)."""
+    if not isinstance(body, dict):
+        return "body must be a JSON object"
+    if not body.get("buyer_id"):
+        return "buyer_id is required"
+    if not isinstance(body["buyer_id"], str):
+        return "buyer_id must be a string"
+    if not isinstance(body.get("crop_wanted", ""), str):
+        return "crop_wanted must be a string"
+    loc = body.get("location", {"lat": 0, "lon": 0})
+    if not (isinstance(loc, dict) and _is_number(loc.get("lat")) and _is_number(loc.get("lon"))):
+        return "location must be {\"lat\": number, \"lon\": number}"
+    for field in ("max_budget", "min_quality", "max_distance_km"):
+        if body.get(field) is not None and not _is_number(body[field]):
+            return f"{field} must be a number"
+    return None
 
 
 # ---------- API: Buyer interest (notifications) ----------
-@app.route("/api/buyer-interest", methods=["POST"])
+@market.route("/api/buyer-interest", methods=["POST"])
 def api_buyer_interest():
     body = request.get_json() or {}
+    if not isinstance(body, dict):
+        return jsonify({"error": "body must be a JSON object"}), 400
+    for field in ("seller_id", "buyer_id", "buyer_name", "crop", "message"):
+        if body.get(field) is not None and not isinstance(body[field], str):
+            return jsonify({"error": f"{field} must be a string"}), 400
     n = {
         "id": str(uuid.uuid4()),
         "seller_id": body.get("seller_id"),
@@ -158,38 +592,133 @@ def api_buyer_interest():
         "message": body.get("message", ""),
         "read": False,
     }
-    notifications.append(n)
+    store.write("notifications", n)
     return jsonify(n)
 
 
-@app.route("/api/notifications", methods=["GET"])
+def _notification_cursor_args():
+    since = request.args.get("since", 0, type=int)
+    limit = request.args.get("limit", type=int)
+    return since, (limit if limit and limit > 0 else None)
+
+
+@market.route("/api/notifications", methods=["GET"])
 def api_notifications():
+    """Seller inbox (or all notifications) after cursor `since`, oldest first, at most `limit`.
+    The cursor for the next page is in the X-Next-Cursor header."""
     seller_id = request.args.get("seller_id")
-    items = [n for n in notifications if n.get("seller_id") == seller_id] if seller_id else notifications
-    return jsonify(items)
+    return _inbox_page(notification_store, seller_id or None)
+
+
+@market.route("/api/notifications/wait", methods=["GET"])
+def api_notifications_wait():
+    """Long-poll a seller's inbox: returns once notifications past `since` exist, or [] after `timeout` s."""
+    seller_id = request.args.get("seller_id")
+    if not seller_id:
+        return jsonify({"error": "seller_id is required"}), 400
+    return _inbox_wait(notification_store, seller_id)
+
+
+@market.route("/api/buyer-alerts", methods=["GET"])
+def api_buyer_alerts():
+    """New-stock alerts for `buyer_id` after cursor `since`; paged like /api/notifications."""
+    buyer_id = request.args.get("buyer_id")
+    if not buyer_id:
+        return jsonify({"error": "buyer_id is required"}), 400
+    return _inbox_page(buyer_alerts, buyer_id)
+
+
+@market.route("/api/buyer-alerts/wait", methods=["GET"])
+def api_buyer_alerts_wait():
+    """Long-poll a buyer's alerts, like /api/notifications/wait."""
+    buyer_id = request.args.get("buyer_id")
+    if not buyer_id:
+        return jsonify({"error": "buyer_id is required"}), 400
+    return _inbox_wait(buyer_alerts, buyer_id)
+
+
+def _inbox_page(inbox, recipient):
+    since, limit = _notification_cursor_args()
+    items = inbox.list(recipient, since, limit)
+    resp = jsonify(items)
+    resp.headers["X-Next-Cursor"] = str(items[-1]["seq"] if items else since)
+    return resp
+
+
+def _inbox_wait(inbox, recipient):
+    since, limit = _notification_cursor_args()
+    timeout = min(max(request.args.get("timeout", 25, type=float), 0), 60)
+    deadline = time.monotonic() + timeout
+    while True:
+        # Wake at least once a second to pull in notifications written by other workers
+        items = inbox.wait(recipient, since, min(1.0, max(deadline - time.monotonic(), 0)), limit)
+        if items or time.monotonic() >= deadline:
+            break
+        store.sync()
+    resp = jsonify(items)
+    resp.headers["X-Next-Cursor"] = str(items[-1]["seq"] if items else since)
+    return resp
 
 
 # ---------- API: Survey ----------
-@app.route("/api/survey", methods=["POST"])
+@surveys.route("/api/survey", methods=["POST"])
 def api_survey():
     body = request.get_json() or {}
-    surveys_store.append({
+    if not isinstance(body, dict):
+        return jsonify({"error": "body must be a JSON object"}), 400
+    for field in ("role", "timestamp"):
+        if body.get(field) is not None and not isinstance(body[field], str):
+            return jsonify({"error": f"{field} must be a string"}), 400
+    if not isinstance(body.get("responses", {}), dict):
+        return jsonify({"error": "responses must be an object"}), 400
+    survey = {
         "id": str(uuid.uuid4()),
         "role": body.get("role"),
         "responses": body.get("responses", {}),
         "timestamp": body.get("timestamp"),
-    })
-    return jsonify({"ok": True, "id": surveys_store[-1]["id"]})
+    }
+    store.write("surveys", survey)
+    return jsonify({"ok": True, "id": survey["id"]})
+
+
+@surveys.route("/api/survey/stats", methods=["GET"])
+def api_survey_stats():
+    """Running counts per role, and per question/answer (optionally for one `role`)."""
+    return jsonify(survey_store.stats(request.args.get("role") or None))
+
+
+@surveys.route("/api/survey/export", methods=["GET"])
+def api_survey_export():
+    """Stream submissions as NDJSON (default) or CSV (`format=csv`), filtered by `role` and
+    ISO-8601 `since` (inclusive) / `until` (exclusive) on the submission timestamp."""
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in ("ndjson", "csv"):
+        return jsonify({"error": "format must be ndjson or csv"}), 400
+    bounds = {}
+    for name in ("since", "until"):
+        value = request.args.get(name)
+        bounds[name] = parse_time(value) if value else None
+        if value and bounds[name] is None:
+            return jsonify({"error": f"{name} must be an ISO-8601 timestamp"}), 400
+    role = request.args.get("role") or None
+    if fmt == "csv":
+        resp = Response(survey_store.iter_csv(role, **bounds), mimetype="text/csv")
+        resp.headers["Content-Disposition"] = "attachment; filename=surveys.csv"
+        return resp
+    return Response(survey_store.iter_ndjson(role, **bounds), mimetype="application/x-ndjson")
 
 
 # ---------- API: Delivery tracking ----------
-@app.route("/api/delivery", methods=["GET", "POST"])
+@delivery.route("/api/delivery", methods=["GET", "POST"])
 def api_delivery():
-    global delivery_status_store
     if request.method == "POST":
         body = request.get_json() or {}
+        if not isinstance(body, dict):
+            return jsonify({"error": "body must be a JSON object"}), 400
         tid = body.get("tracking_id") or str(uuid.uuid4())
-        delivery_status_store[tid] = {
+        if not isinstance(tid, str):
+            return jsonify({"error": "tracking_id must be a string"}), 400
+        record = {
             "tracking_id": tid,
             "status": body.get("status", "created"),
             "stages": body.get("stages", [
@@ -201,35 +730,139 @@ def api_delivery():
             "origin": body.get("origin", ""),
             "destination": body.get("destination", ""),
         }
-        return jsonify(delivery_status_store[tid])
+        if not isinstance(record["status"], str):
+            return jsonify({"error": "status must be a string"}), 400
+        if not stages_valid(record["stages"]):
+            return jsonify({"error": "stages must be a list of objects with a string name"}), 400
+        store.write("deliveries", record, key=tid)
+        return jsonify(record)
     tid = request.args.get("tracking_id")
     if tid and tid in delivery_status_store:
         return jsonify(delivery_status_store[tid])
     return jsonify(list(delivery_status_store.values()))
 
 
+@delivery.route("/api/deliveries", methods=["GET"])
+def api_deliveries():
+    """Deliveries filtered by `status`, `origin`, `destination` (exact, case-insensitive),
+    ordered by tracking id. Pass `next_cursor` back as `cursor` for the next page."""
+    limit = request.args.get("limit", 100, type=int)
+    if limit < 1:
+        return jsonify({"error": "limit must be >= 1"}), 400
+    filters = {f: request.args.get(f) for f in INDEXED_FIELDS}
+    items, next_cursor = deliveries.query(filters, request.args.get("cursor"), min(limit, 1000))
+    return jsonify({"items": items, "next_cursor": next_cursor, "counts": deliveries.counts("status")})
+
+
+@delivery.route("/api/delivery/bulk", methods=["POST"])
+def api_delivery_bulk():
+    """
+    Move many shipments to a stage in one atomic call. Body: {"updates": [{"tracking_id",
+    "stage", "status"?}, ...]} or {"tracking_ids": [...], "stage", "status"?}. Either every
+    update is applied (in one transaction) or none is, with the failing entries listed.
+    Planning and commit run with other writers blocked, so no concurrent update is lost.
+    """
+    body = request.get_json(silent=True) or {}
+    if not isinstance(body, dict):
+        return jsonify({"error": "body must be a JSON object"}), 400
+    if "updates" in body:
+        updates = body["updates"]
+    else:
+        if not isinstance(body.get("tracking_ids") or [], list):
+            return jsonify({"error": "tracking_ids must be a list"}), 400
+        updates = [{"tracking_id": tid, "stage": body.get("stage"), "status": body.get("status")}
+                   for tid in body.get("tracking_ids") or []]
+    if not isinstance(updates, list) or not all(isinstance(u, dict) and isinstance(u.get("tracking_id"), str)
+                                                for u in updates):
+        return jsonify({"error": "updates must be a list of objects with a string tracking_id"}), 400
+    if any(u.get("status") is not None and not isinstance(u["status"], str) for u in updates):
+        return jsonify({"error": "status must be a string"}), 400
+    if not updates or len(updates) > DELIVERY_BULK_MAX:
+        return jsonify({"error": f"send between 1 and {DELIVERY_BULK_MAX} updates"}), 400
+
+    def plan():
+        planned, errors = deliveries.plan_transitions(updates)
+        if errors:
+            return [], (None, errors)
+        return [("deliveries", tid, rec) for tid, rec in planned.items()], (planned, None)
+
+    planned, errors = store.write_planned(plan)
+    if errors:
+        return jsonify({"error": "no updates applied", "failed": errors}), 400
+    return jsonify({"ok": True, "updated": len(planned)})
+
+
+# ---------- Metrics & profiling ----------
+@core.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(request_metrics.render() + response_cache.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+
+@core.route("/debug/profile", methods=["GET", "POST"])
+def debug_profile():
+    """POST {"route": "/api/match", "requests": 20} profiles that route's next requests (route
+    as in /metrics). GET ?route=... returns their cProfile stats (`sort`, `limit`), or the status."""
+    if route_profiler is None:
+        return jsonify({"error": "profiling is disabled (set AGRI_PROFILING=1)"}), 404
+    if request.method == "POST":
+        body = request.get_json() or {}
+        route = body.get("route")
+        requests_n = body.get("requests", 10)
+        if not route or not isinstance(requests_n, int) or requests_n < 1:
+            return jsonify({"error": "route and requests >= 1 are required"}), 400
+        route_profiler.arm(route, requests_n)
+        return jsonify(route_profiler.status())
+    route = request.args.get("route")
+    if not route:
+        return jsonify(route_profiler.status())
+    try:
+        report = route_profiler.report(route, request.args.get("sort", "cumulative"),
+                                       request.args.get("limit", 40, type=int))
+    except KeyError:
+        return jsonify({"error": "unknown sort key"}), 400
+    if report is None:
+        return jsonify({"error": "no profile for this route yet"}), 404
+    return Response(report, mimetype="text/plain")
+
+
 # ---------- Static uploads ----------
-@app.route("/static/uploads/<path:filename>")
+@disease.route("/static/uploads/<path:filename>")
 def serve_upload(filename):
     return send_from_directory(UPLOAD_FOLDER, filename)
 
 
 # ---------- Sample images (placeholder URLs - replace with real paths) ----------
-@app.route("/api/sample-images", methods=["GET"])
+# Return placeholder image URLs; frontend can use unsplash or local assets
+_IMG_BASE = "https://images.unsplash.com"
+SAMPLE_IMAGES = {
+    "crops": [f"{_IMG_BASE}/photo-1574943320219-553eb213f72d?w=400", f"{_IMG_BASE}/photo-1500382017468-9049fed747ef?w=400"],
+    "diseases": [f"{_IMG_BASE}/photo-1597848212624-a19eb35e2651?w=400", f"{_IMG_BASE}/photo-1416879595882-3373a0480b5b?w=400"],
+    "fertilizers": [f"{_IMG_BASE}/photo-1416879595882-3373a0480b5b?w=400"],
+    "soil": [f"{_IMG_BASE}/photo-1416879595882-3373a0480b5b?w=400"],
+    "cultivation": [f"{_IMG_BASE}/photo-1500382017468-9049fed747ef?w=400", f"{_IMG_BASE}/photo-1574943320219-553eb213f72d?w=400"],
+    "delivery": [f"{_IMG_BASE}/photo-1566576912321-d58ddd7a5938?w=400"],
+}
+
+
+@core.route("/api/sample-images", methods=["GET"])
 def api_sample_images():
     feature = request.args.get("feature", "crops")
-    # Return placeholder image URLs; frontend can use unsplash or local assets
-    base = "https://images.unsplash.com"
-    images = {
-        "crops": [f"{base}/photo-1574943320219-553eb213f72d?w=400", f"{base}/photo-1500382017468-9049fed747ef?w=400"],
-        "diseases": [f"{base}/photo-1597848212624-a19eb35e2651?w=400", f"{base}/photo-1416879595882-3373a0480b5b?w=400"],
-        "fertilizers": [f"{base}/photo-1416879595882-3373a0480b5b?w=400"],
-        "soil": [f"{base}/photo-1416879595882-3373a0480b5b?w=400"],
-        "cultivation": [f"{base}/photo-1500382017468-9049fed747ef?w=400", f"{base}/photo-1574943320219-553eb213f72d?w=400"],
-        "delivery": [f"{base}/photo-1566576912321-d58ddd7a5938?w=400"],
-    }
-    return jsonify(images.get(feature, images["crops"]))
+    if feature not in SAMPLE_IMAGES:
+        feature = "crops"
+    return _cached_json((feature,), lambda: _json_body(SAMPLE_IMAGES[feature]), "public, max-age=86400")
+
+
+@core.route("/api/response-cache", methods=["GET", "DELETE"])
+def api_response_cache():
+    """Response cache size and per-route hit rates; DELETE empties both tiers."""
+    if request.method == "DELETE":
+        response_cache.clear()
+    return jsonify(response_cache.stats())
 
 
 if __name__ == "__main__":
-    app.run(debug=True, port=5000, host="0.0.0.0")
+    if "--startup-report" in sys.argv:
+        from backend.startup import print_startup_report
+        print_startup_report()
+    else:
+        create_app().run(debug=True, port=5000, host="0.0.0.0")
@@ -0,0 +1,91 @@
+"""
+Parity check and benchmark for the precomputed crop recommendation table.
+Run from the project root: python benchmarks/bench_crops.py
+
+Every combination of soil, previous crop, season and water level (including unknown and
+un-normalized values) is answered from the table and compared with a frozen copy of the
+original recommend_crops (rule scoring on every call); any mismatch exits non-zero before timing.
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.crop_predictor import CROP_FAMILIES, SEASON_CROPS, SOIL_TYPES, WATER_CROPS, recommend_crops
+
+SOILS = list(SOIL_TYPES) + ["", None, " Black ", "purple"]
+PREVIOUS = list(CROP_FAMILIES) + ["", None, "Pigeon Pea", "groundnut oil", "rice ", "okra"]
+SEASONS = list(SEASON_CROPS) + ["", None, "Rabi", "spring"]
+WATER = list(WATER_CROPS) + ["", None, "HIGH", "none"]
+
+
+# recommend_crops and get_family as they were before the table, kept verbatim as the reference
+
+def baseline_get_family(crop_key):
+    for k, v in CROP_FAMILIES.items():
+        if k in crop_key or crop_key in k:
+            return v
+    return None
+
+def baseline_recommend_crops(soil_color: str, previous_crop: str, season: str, water_availability: str) -> dict:
+    soil_color = (soil_color or "").strip().lower()
+    previous_crop = (previous_crop or "").strip().lower().replace(" ", "_")
+    season = (season or "").strip().lower()
+    water_availability = (water_availability or "medium").strip().lower()
+
+    avoid_family = baseline_get_family(previous_crop)
+    season_list = SEASON_CROPS.get(season, list(SEASON_CROPS.get("kharif", [])) + list(SEASON_CROPS.get("rabi", [])))
+    water_list = WATER_CROPS.get(water_availability, WATER_CROPS["medium"])
+
+    # Intersection and scoring
+    candidates = {}
+    for c in set(season_list + water_list):
+        c_lower = c.lower().replace(" ", "_")
+        score = 0
+        if c_lower in season_list:
+            score += 2
+        if c_lower in water_list:
+            score += 2
+        if avoid_family and baseline_get_family(c_lower) == avoid_family:
+            score -= 2  # rotation
+        if score > 0:
+            candidates[c_lower] = score
+
+    recommended = sorted(candidates.keys(), key=lambda x: -candidates[x])[:5]
+    if not recommended:
+        recommended = ["wheat", "chickpea", "mustard", "lentil", "barley"]
+
+    return {
+        "recommended_crops": [{"name": c.replace("_", " ").title(), "key": c} for c in recommended],
+        "soil_type": SOIL_TYPES.get(soil_color, "general"),
+        "message": f"Based on {soil_color or 'your'} soil, previous crop ({previous_crop or 'none'}), {season} season, and {water_availability} water availability."
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--number", type=int, default=20000)
+    args = ap.parse_args()
+
+    combos = list(itertools.product(SOILS, PREVIOUS, SEASONS, WATER))
+    mismatches = [c for c in combos if recommend_crops(*c) != baseline_recommend_crops(*c)]
+    if mismatches:
+        print(f"{len(mismatches)} of {len(combos)} combinations differ, e.g. {mismatches[0]}")
+        sys.exit(1)
+    print(f"parity: {len(combos)} combinations match")
+
+    query = ("black", "rice", "rabi", "low")
+    for label, fn in (("baseline", baseline_recommend_crops), ("table", recommend_crops)):
+        t0 = time.perf_counter()
+        for _ in range(args.number):
+            fn(*query)
+        print(f"{label:>8}: {(time.perf_counter() - t0) / args.number * 1e6:.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
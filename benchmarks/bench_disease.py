@@ -0,0 +1,86 @@
+"""
+Benchmark: disease prediction latency and peak memory per image size, full-resolution
+decode vs the reduced-resolution analysis path.
+Run from the project root: python benchmarks/bench_disease.py [--max-side 512]
+
+Each case runs in a fresh process. "traced MB" is the tracemalloc peak (Python objects and
+numpy arrays); "rss MB" is the growth in peak resident memory, which also covers Pillow's
+decode buffers (not available on Windows).
+"""
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SIZES = [(640, 480), (1920, 1080), (3024, 4032), (4000, 6000)]
+
+
+def make_jpeg(width, height, quality=90):
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(width * height)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([(x * 255 // width), (y * 255 // height), ((x + y) * 127 // (width + height))], axis=-1)
+    noise = rng.integers(0, 40, size=base.shape)
+    img = Image.fromarray(np.clip(base + noise, 0, 255).astype("uint8"), "RGB")
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=quality)
+    return buf.getvalue()
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return float("nan")
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_case(data, max_side, repeat):
+    from backend.disease_predictor import predict_disease_from_image, prediction_cache
+
+    prediction_cache.max_entries = 0  # measure the analysis, not cache hits
+    predict_disease_from_image(data, max_side=64)  # warm imports and codecs
+    rss_before = _peak_rss_mb()
+    tracemalloc.start()
+    result = predict_disease_from_image(data, max_side=max_side)
+    traced_peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    rss_growth = _peak_rss_mb() - rss_before
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        predict_disease_from_image(data, max_side=max_side)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1e3, traced_peak, rss_growth, result["prediction"]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--max-side", type=int, default=512)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    print(f"{'image':>11} {'mode':>9} {'ms':>8} {'traced MB':>10} {'rss MB':>8}  prediction")
+    for w, h in SIZES:
+        data = make_jpeg(w, h)
+        for label, max_side in (("full", 0), (f"<= {args.max_side}", args.max_side)):
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                ms, traced, rss, pred = pool.submit(run_case, data, max_side, args.repeat).result()
+            print(f"{w:>5}x{h:<5} {label:>9} {ms:>8.1f} {traced:>10.1f} {rss:>8.1f}  {pred}")
+
+
+if __name__ == "__main__":
+    main()
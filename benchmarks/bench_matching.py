@@ -0,0 +1,89 @@
+"""
+Benchmark: buyer-seller matching engines (scan, grid index, crop catalogue, numpy) as the seller count grows.
+Run from the project root: python benchmarks/bench_matching.py [--sizes 1000 10000 50000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.matching import SellerCatalogue, SellerIndex, match_buyers_to_sellers
+
+CROPS = ["wheat", "rice", "maize", "cotton", "mustard", "chickpea", "potato", "onion"]
+
+
+def make_sellers(n, rng):
+    # Spread over roughly the Indian subcontinent
+    return [
+        {
+            "id": f"s{i}",
+            "name": f"Seller {i}",
+            "location": {"lat": rng.uniform(8, 34), "lon": rng.uniform(68, 96)},
+            "crops": [
+                {
+                    "name": rng.choice(CROPS),
+                    "quantity": rng.randint(1, 100),
+                    "unit_price": rng.randint(10, 500),
+                    "quality_score": rng.randint(1, 10),
+                }
+                for _ in range(rng.randint(1, 3))
+            ],
+        }
+        for i in range(n)
+    ]
+
+
+def make_buyers(n, rng):
+    return [
+        {
+            "id": f"b{i}",
+            "crop_wanted": rng.choice(CROPS),
+            "max_budget": rng.randint(1000, 50000),
+            "min_quality": rng.randint(0, 6),
+            "location": {"lat": rng.uniform(8, 34), "lon": rng.uniform(68, 96)},
+        }
+        for i in range(n)
+    ]
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000, 50000])
+    ap.add_argument("--buyers", type=int, default=20)
+    ap.add_argument("--max-distance-km", type=float, default=200)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    buyers = make_buyers(args.buyers, rng)
+    print(f"{'sellers':>8} {'scan ms':>10} {'grid ms':>10} {'prebuilt ms':>12} {'catalogue ms':>13} {'numpy ms':>10} {'matches':>8}")
+    for n in args.sizes:
+        sellers = make_sellers(n, rng)
+        index = SellerIndex(sellers)
+        catalogue = SellerCatalogue(sellers)
+        t_scan, scan = timed(lambda: match_buyers_to_sellers(buyers, sellers, args.max_distance_km, engine="scan"), args.repeat)
+        t_grid, grid = timed(lambda: match_buyers_to_sellers(buyers, sellers, args.max_distance_km), args.repeat)
+        t_pre, pre = timed(lambda: match_buyers_to_sellers(buyers, index, args.max_distance_km), args.repeat)
+        t_cat, cat = timed(lambda: match_buyers_to_sellers(buyers, catalogue, args.max_distance_km), args.repeat)
+        t_np, vec = timed(lambda: match_buyers_to_sellers(buyers, sellers, args.max_distance_km, engine="numpy"), args.repeat)
+        assert scan == grid == pre == cat == vec, f"engine results differ from scan at {n} sellers"
+        print(f"{n:>8} {t_scan * 1e3:>10.1f} {t_grid * 1e3:>10.1f} {t_pre * 1e3:>12.1f} {t_cat * 1e3:>13.1f} {t_np * 1e3:>10.1f} {len(scan):>8}")
+
+
+if __name__ == "__main__":
+    main()
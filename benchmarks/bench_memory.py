@@ -0,0 +1,126 @@
+"""
+Benchmark: memory held by seller profiles and notifications as plain lists of dicts (as
+replayed from the record log) versus the compact record tables, plus the time to build,
+fully decode and match against each. Allocations are measured with tracemalloc.
+Run from the project root: python benchmarks/bench_memory.py [--sizes 10000 100000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+for path in (ROOT, HERE):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from backend.compact import RecordTable
+from backend.matching import SELLER_SCHEMA, SellerCatalogue, match_buyers_to_sellers
+from backend.notifications import BUYER_INTEREST_SCHEMA, NotificationStore
+from bench_matching import CROPS, make_buyers, make_sellers
+
+
+def make_uuid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def make_notifications(n, seller_ids, rng):
+    return [
+        {
+            "id": make_uuid(rng),
+            "seller_id": rng.choice(seller_ids),
+            "buyer_id": f"b{rng.randrange(1000)}",
+            "buyer_name": "Demo Buyer",
+            "crop": rng.choice(CROPS),
+            "quantity": str(rng.randint(1, 100)),
+            "message": "I would like to purchase.",
+            "read": False,
+        }
+        for _ in range(n)
+    ]
+
+
+def measure(build):
+    """(result, bytes still allocated by it, seconds to build). Timed on a separate build,
+    since tracing every allocation slows the code down severalfold."""
+    t0 = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - t0
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def add_all(target, docs):
+    # Records arrive as JSON from the log, so every doc carries its own copies of strings
+    add = target.add if hasattr(target, "add") else target.append
+    for d in docs:
+        add(json.loads(d))
+    return target
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000], help="seller counts")
+    ap.add_argument("--notifications-per-seller", type=int, default=2)
+    ap.add_argument("--buyers", type=int, default=100)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'collection':<34} {'records':>8} {'dicts MB':>9} {'compact MB':>11} {'ratio':>6}"
+          f" {'build s':>13} {'decode all s':>13}")
+    for n in args.sizes:
+        sellers = make_sellers(n, rng)
+        for s in sellers:
+            s["id"] = make_uuid(rng)  # the API assigns uuid4 ids
+        seller_docs = [json.dumps(s) for s in sellers]
+        n_offers = sum(len(s["crops"]) for s in sellers)
+        notif_docs = [json.dumps(d) for d in make_notifications(
+            n * args.notifications_per_seller, [s["id"] for s in sellers], rng)]
+        buyers = make_buyers(args.buyers, rng)
+
+        rows = [
+            (f"sellers ({n_offers} offers)", len(seller_docs),
+             lambda: add_all([], seller_docs), lambda: add_all(RecordTable(SELLER_SCHEMA), seller_docs)),
+            ("seller catalogue (with indexes)", len(seller_docs),
+             lambda: add_all(SellerCatalogue(compact=False), seller_docs), lambda: add_all(SellerCatalogue(), seller_docs)),
+            ("buyer-interest notifications", len(notif_docs),
+             lambda: add_all([], notif_docs),
+             lambda: add_all(NotificationStore("seller_id", BUYER_INTEREST_SCHEMA), notif_docs)),
+        ]
+        built = {}
+        for name, count, build_dicts, build_compact in rows:
+            plain, plain_size, plain_s = measure(build_dicts)
+            compact, compact_size, compact_s = measure(build_compact)
+            table = compact.items if isinstance(compact, NotificationStore) else compact
+            table = table.sellers if isinstance(table, SellerCatalogue) else table
+            decode_s = timed(lambda: list(table))
+            print(f"{name:<34} {count:>8} {plain_size / 2**20:>9.1f} {compact_size / 2**20:>11.1f}"
+                  f" {plain_size / max(compact_size, 1):>5.1f}x {plain_s:>6.2f}/{compact_s:<6.2f} {decode_s:>13.3f}")
+            built[name] = (plain, compact)
+
+        plain_cat, compact_cat = built["seller catalogue (with indexes)"]
+        t_plain = timed(lambda: match_buyers_to_sellers(buyers, plain_cat))
+        t_compact = timed(lambda: match_buyers_to_sellers(buyers, compact_cat))
+        same = match_buyers_to_sellers(buyers, plain_cat) == match_buyers_to_sellers(buyers, compact_cat)
+        print(f"{'match ' + str(args.buyers) + ' buyers (dicts/compact)':<34} {'':>8} {'':>9} {'':>11} {'':>6}"
+              f" {t_plain:>6.2f}/{t_compact:<6.2f} {'same' if same else 'DIFFERENT':>13}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Micro-benchmarks for the core backend functions over synthetic inputs of growing size.
+Run from the project root:
+    python benchmarks/bench_suite.py [--quick] [--out results.json] [--compare baseline.json]
+
+Cases cover recommend_crops, recommend_fertilizers, get_cultivation_steps,
+match_buyers_to_sellers (growing seller and buyer counts) and predict_disease_from_image
+(growing image resolution, prediction cache off). Each case reports the median and best
+time per call over --repeat rounds. --out saves the results as JSON; --compare flags cases
+whose median is more than --tolerance slower than in an earlier file and exits non-zero.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+for path in (ROOT, HERE):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from backend.crop_predictor import CROP_FAMILIES, SEASON_CROPS, SOIL_TYPES, WATER_CROPS, recommend_crops
+from backend.cultivation_guide import CROP_OVERRIDES, get_cultivation_steps
+from backend.fertilizer_recommender import recommend_fertilizers
+from backend.matching import SellerCatalogue, match_buyers_to_sellers
+from bench_matching import make_buyers, make_sellers
+
+SELLER_SIZES = [1000, 10000, 50000]
+BUYER_SIZES = [10, 100]
+IMAGE_SIZES = [(320, 240), (1280, 720), (1920, 1080), (4000, 3000)]
+FERTILIZER_QUERIES = [("rice", None), ("wheat", "rust"), ("Basmati Rice", "leaf spot"), ("tomato", "early blight"),
+                      ("dragonfruit", None), ("", "")]
+
+
+def measure(fn, number, repeat):
+    """Per-call seconds for each of `repeat` rounds of `number` calls."""
+    rounds = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        rounds.append((time.perf_counter() - t0) / number)
+    return rounds
+
+
+def cycle(items):
+    """A zero-argument callable returning the next item on each call."""
+    state = {"i": -1}
+
+    def nxt():
+        state["i"] = (state["i"] + 1) % len(items)
+        return items[state["i"]]
+    return nxt
+
+
+def cases(args, rng):
+    """Yield (name, fn, calls per round)."""
+    queries = [
+        (rng.choice(list(SOIL_TYPES)), rng.choice(list(CROP_FAMILIES) + [""]),
+         rng.choice(list(SEASON_CROPS)), rng.choice(list(WATER_CROPS)))
+        for _ in range(256)
+    ]
+    crop_query = cycle(queries)
+    yield "crops/recommend", lambda: recommend_crops(*crop_query()), 5000
+
+    fert_query = cycle(FERTILIZER_QUERIES)
+    yield "fertilizer/recommend", lambda: recommend_fertilizers(*fert_query()), 5000
+
+    guide_key = cycle(list(CROP_OVERRIDES) + ["unknown_crop"])
+    yield "cultivation/steps", lambda: get_cultivation_steps(guide_key()), 5000
+
+    for n_sellers in args.sellers:
+        sellers = make_sellers(n_sellers, rng)
+        catalogue = SellerCatalogue(sellers)
+        for n_buyers in args.buyers:
+            buyers = make_buyers(n_buyers, rng)
+            yield (f"matching/grid sellers={n_sellers} buyers={n_buyers}",
+                   lambda: match_buyers_to_sellers(buyers, sellers), 1)
+            yield (f"matching/catalogue sellers={n_sellers} buyers={n_buyers}",
+                   lambda: match_buyers_to_sellers(buyers, catalogue), 1)
+
+    if not args.skip_disease:
+        from backend.disease_predictor import predict_disease_from_image, prediction_cache
+        from bench_disease import make_jpeg
+
+        prediction_cache.max_entries = 0  # time the analysis, not cache hits
+        for w, h in args.images:
+            data = make_jpeg(w, h)
+            yield f"disease/predict {w}x{h}", lambda: predict_disease_from_image(data), 3
+
+
+def compare(results, baseline_path, tolerance):
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    regressions = []
+    print(f"\n{'case':<48} {'baseline ms':>12} {'now ms':>10} {'change':>8}")
+    for name, r in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        change = r["median_ms"] / old["median_ms"] - 1 if old["median_ms"] else 0.0
+        flag = "  REGRESSION" if change > tolerance else ""
+        print(f"{name:<48} {old['median_ms']:>12.4f} {r['median_ms']:>10.4f} {change:>+8.0%}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sellers", type=int, nargs="+", default=SELLER_SIZES)
+    ap.add_argument("--buyers", type=int, nargs="+", default=BUYER_SIZES)
+    ap.add_argument("--images", nargs="+", default=[f"{w}x{h}" for w, h in IMAGE_SIZES],
+                    help="image resolutions as WIDTHxHEIGHT")
+    ap.add_argument("--skip-disease", action="store_true", help="skip the image cases (no Pillow/numpy needed)")
+    ap.add_argument("--quick", action="store_true", help="small sizes and fewer rounds, for a smoke run")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--out", help="write results to this JSON file")
+    ap.add_argument("--compare", help="earlier results JSON to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before flagging (0.25 = 25%%)")
+    args = ap.parse_args()
+    if args.quick:
+        args.sellers, args.buyers, args.repeat = [1000, 5000], [10], 3
+        args.images = ["320x240", "1280x720"]
+    args.images = [tuple(int(v) for v in size.lower().split("x")) for size in args.images]
+
+    rng = random.Random(args.seed)
+    results = {}
+    print(f"{'case':<48} {'median ms':>10} {'best ms':>10}")
+    for name, fn, number in cases(args, rng):
+        fn()  # warm caches and lazy imports outside the timing
+        rounds = measure(fn, number, args.repeat)
+        results[name] = {
+            "median_ms": statistics.median(rounds) * 1e3,
+            "best_ms": min(rounds) * 1e3,
+            "calls_per_round": number,
+            "rounds": args.repeat,
+        }
+        print(f"{name:<48} {results[name]['median_ms']:>10.4f} {results[name]['best_ms']:>10.4f}")
+
+    if args.out:
+        meta = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+        }
+        with open(args.out, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+        print(f"\nresults written to {args.out}")
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Load generator: replays the request mix the single-page UI (static/js/app.js) sends and
+reports p50/p99 latency per call and overall throughput.
+Run from the project root:
+    python benchmarks/load_test.py [--requests 2000] [--concurrency 8] [--out load.json]
+    python benchmarks/load_test.py --url http://127.0.0.1:5000   # against a running server
+
+Without --url the app runs in-process through the Flask test client with in-memory storage,
+so nothing is written to data/. The request schedule is fixed by --seed, and the catalogue
+is pre-filled with --sellers sellers before timing starts.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+for path in (ROOT, HERE):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from bench_matching import CROPS, make_sellers
+
+SOILS = ["black", "red", "alluvial", "laterite", "sandy", "clay"]
+SEASONS = ["kharif", "rabi", "zaid"]
+WATER = ["low", "medium", "high"]
+LANGS = ["en", "hi", "ta", "te"]
+GUIDES = ["rice", "wheat", "maize", "cotton", "tomato", "potato"]
+FEATURES = ["crops", "diseases", "fertilizers", "soil", "cultivation", "delivery"]
+
+# (name, weight): roughly how often a UI session makes each call
+MIX = [
+    ("GET /", 4),
+    ("GET /api/i18n/<lang>", 4),
+    ("POST /api/predict-crop", 14),
+    ("POST /api/fertilizer", 10),
+    ("POST /api/disease-predict", 5),
+    ("GET /api/cultivation/<crop_key>", 10),
+    ("GET /api/sample-images", 12),
+    ("POST /api/survey", 3),
+    ("POST /api/sellers", 4),
+    ("GET /api/notifications", 6),
+    ("POST /api/match", 14),
+    ("POST /api/buyer-interest", 5),
+    ("POST /api/delivery", 3),
+    ("GET /api/delivery", 6),
+]
+
+
+def make_image():
+    try:
+        from bench_disease import make_jpeg
+    except ImportError:  # Pillow/numpy missing: the endpoint still gets a (bad) upload
+        return b"not an image"
+    return make_jpeg(640, 480)
+
+
+def build_request(name, rng, image):
+    """(method, path, json body or None, image bytes or None) for one call of `name`."""
+    loc = {"lat": round(rng.uniform(8, 34), 4), "lon": round(rng.uniform(68, 96), 4)}
+    if name == "GET /":
+        return "GET", "/", None, None
+    if name == "GET /api/i18n/<lang>":
+        return "GET", f"/api/i18n/{rng.choice(LANGS)}", None, None
+    if name == "POST /api/predict-crop":
+        return "POST", "/api/predict-crop", {
+            "soil_color": rng.choice(SOILS), "previous_crop": rng.choice(CROPS),
+            "season": rng.choice(SEASONS), "water_availability": rng.choice(WATER)}, None
+    if name == "POST /api/fertilizer":
+        return "POST", "/api/fertilizer", {"crop": rng.choice(GUIDES),
+                                           "disease_detected": rng.choice([None, "rust", "leaf spot"])}, None
+    if name == "POST /api/disease-predict":
+        return "POST", "/api/disease-predict", None, image
+    if name == "GET /api/cultivation/<crop_key>":
+        return "GET", f"/api/cultivation/{rng.choice(GUIDES)}", None, None
+    if name == "GET /api/sample-images":
+        return "GET", f"/api/sample-images?feature={rng.choice(FEATURES)}", None, None
+    if name == "POST /api/survey":
+        return "POST", "/api/survey", {"role": "farmer", "timestamp": "2025-01-01T00:00:00Z",
+                                       "responses": {"satisfaction": rng.choice(["1", "3", "5"]),
+                                                     "more_regional_language": rng.choice(["yes", "no"])}}, None
+    if name == "POST /api/sellers":
+        return "POST", "/api/sellers", {"name": "Load seller", "location": loc, "crops": [
+            {"name": rng.choice(CROPS), "quantity": rng.randint(1, 100), "unit_price": rng.randint(10, 500),
+             "quality_score": rng.randint(1, 10)}]}, None
+    if name == "GET /api/notifications":
+        return "GET", f"/api/notifications?seller_id=s{rng.randrange(100)}&limit=50", None, None
+    if name == "POST /api/match":
+        return "POST", "/api/match", {"buyers": [{"id": "b1", "crop_wanted": rng.choice(CROPS), "max_budget": 50000,
+                                                  "min_quality": 5, "location": loc}], "max_distance_km": 200}, None
+    if name == "POST /api/buyer-interest":
+        return "POST", "/api/buyer-interest", {"seller_id": f"s{rng.randrange(100)}", "buyer_id": "b1",
+                                               "buyer_name": "Demo Buyer", "crop": rng.choice(CROPS),
+                                               "quantity": "10", "message": "I would like to purchase."}, None
+    if name == "POST /api/delivery":
+        return "POST", "/api/delivery", {"origin": "Farm A, Punjab", "destination": "Market, Delhi"}, None
+    if name == "GET /api/delivery":
+        return "GET", "/api/delivery?tracking_id=DEMO001", None, None
+    raise ValueError(name)
+
+
+class TestClientTransport:
+    """In-process calls through the Flask test client (one client per thread)."""
+
+    def __init__(self):
+        os.environ.setdefault("AGRI_STORAGE", "memory")
+        import app as agri_app
+        self.app = agri_app.app
+        self._local = threading.local()
+
+    def send(self, method, path, body=None, image=None):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        if image is not None:
+            resp = client.open(path, method=method, data={"image": (io.BytesIO(image), "leaf.jpg")},
+                               content_type="multipart/form-data")
+        else:
+            resp = client.open(path, method=method, json=body)
+        resp.get_data()
+        return resp.status_code
+
+
+class HttpTransport:
+    """Real HTTP against a running server (one requests.Session per thread)."""
+
+    def __init__(self, url):
+        import requests
+        self._requests = requests
+        self.url = url.rstrip("/")
+        self._local = threading.local()
+
+    def send(self, method, path, body=None, image=None):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = self._requests.Session()
+        files = {"image": ("leaf.jpg", image, "image/jpeg")} if image is not None else None
+        resp = session.request(method, self.url + path, json=body, files=files, timeout=60)
+        return resp.status_code
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values))) - 1))
+    return sorted_values[k]
+
+
+def run(transport, schedule, concurrency):
+    """Send every scheduled request using `concurrency` threads; returns (latencies by name, errors, wall s)."""
+    latencies = {name: [] for name, _ in MIX}
+    errors = {name: 0 for name, _ in MIX}
+    lock = threading.Lock()
+    position = iter(range(len(schedule)))
+
+    def worker():
+        while True:
+            with lock:
+                i = next(position, None)
+            if i is None:
+                return
+            name, (method, path, body, image) = schedule[i]
+            t0 = time.perf_counter()
+            try:
+                ok = transport.send(method, path, body, image) < 500
+            except Exception:
+                ok = False
+            elapsed = time.perf_counter() - t0
+            with lock:
+                latencies[name].append(elapsed)
+                if not ok:
+                    errors[name] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors, time.perf_counter() - t0
+
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "p50_ms": percentile(values, 50) * 1e3,
+        "p99_ms": percentile(values, 99) * 1e3,
+        "max_ms": (values[-1] if values else 0.0) * 1e3,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", help="base URL of a running server (default: in-process test client)")
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--sellers", type=int, default=500, help="sellers registered before timing")
+    ap.add_argument("--warmup", type=int, default=100)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--out", help="write results to this JSON file")
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    transport = HttpTransport(args.url) if args.url else TestClientTransport()
+    for s in make_sellers(args.sellers, rng):
+        transport.send("POST", "/api/sellers", {k: s[k] for k in ("name", "location", "crops")})
+
+    image = make_image()
+    names = [name for name, _ in MIX]
+    weights = [w for _, w in MIX]
+    schedule = [(name, build_request(name, rng, image))
+                for name in rng.choices(names, weights, k=args.warmup + args.requests)]
+    run(transport, schedule[:args.warmup], args.concurrency)
+    latencies, errors, wall = run(transport, schedule[args.warmup:], args.concurrency)
+
+    per_route = {name: dict(summarize(latencies[name]), errors=errors[name]) for name in names if latencies[name]}
+    overall = dict(summarize([v for vs in latencies.values() for v in vs]), errors=sum(errors.values()),
+                   throughput_rps=args.requests / wall, wall_s=wall)
+
+    print(f"{'call':<34} {'count':>6} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, r in per_route.items():
+        print(f"{name:<34} {r['count']:>6} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['errors']:>7}")
+    print(f"{'all':<34} {overall['count']:>6} {overall['p50_ms']:>9.2f} {overall['p99_ms']:>9.2f} {overall['errors']:>7}")
+    print(f"throughput: {overall['throughput_rps']:.1f} req/s over {wall:.2f} s "
+          f"({args.concurrency} concurrent, {'in-process' if not args.url else args.url})")
+
+    if args.out:
+        meta = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "target": args.url or "in-process",
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "sellers": args.sellers,
+            "seed": args.seed,
+        }
+        with open(args.out, "w") as f:
+            json.dump({"meta": meta, "overall": overall, "routes": per_route}, f, indent=2)
+        print(f"results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
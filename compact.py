@@ -0,0 +1,301 @@
+"""
+Compact in-memory tables for long-lived, append-only record collections (seller profiles
+with their offers, notifications). Each field of a fixed schema is kept in a typed column:
+ids as two 64-bit halves of their UUID, repeated strings (seller/buyer ids, crop and seller
+names) as integer ids into a shared string pool, numbers in float arrays and nested record
+lists (a seller's crops) as row ranges of a child table.
+
+Rows decode back into the exact dicts they were built from, so API payloads are unchanged.
+A value a column cannot hold (unexpected type, extra or missing key) is kept verbatim in a
+per-row overflow dict, which costs a dict again but only for the odd record.
+"""
+import uuid
+from array import array
+
+MISSING = object()  # overflow marker: the key was absent from the original record
+_MASK64 = (1 << 64) - 1
+_MAX_EXACT_INT = 1 << 53  # larger ints do not survive a round trip through a double
+
+
+class StringPool:
+    """Interns strings to small integer ids; each distinct string is stored once."""
+
+    def __init__(self):
+        self._ids = {}
+        self.strings = []
+
+    def __len__(self):
+        return len(self.strings)
+
+    def intern(self, s: str) -> int:
+        i = self._ids.get(s)
+        if i is None:
+            i = self._ids[s] = len(self.strings)
+            self.strings.append(s)
+        return i
+
+
+# Every column appends exactly one slot per row. append() returns False when the value
+# does not fit; the slot is then a placeholder and the table keeps the value in overflow.
+
+class _IdColumn:
+    """Canonical UUID strings as two unsigned 64-bit halves; other strings via the pool."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.hi = array("Q")
+        self.lo = array("Q")
+        self.kind = array("b")  # 0: uuid, 1: pooled string, -1: placeholder
+
+    def append(self, v) -> bool:
+        if isinstance(v, str):
+            u = None
+            if len(v) == 36:
+                try:
+                    u = uuid.UUID(v)
+                except ValueError:
+                    pass
+            if u is not None and str(u) == v:
+                self.hi.append(u.int >> 64)
+                self.lo.append(u.int & _MASK64)
+                self.kind.append(0)
+            else:
+                self.hi.append(self.pool.intern(v))
+                self.lo.append(0)
+                self.kind.append(1)
+            return True
+        self.hi.append(0)
+        self.lo.append(0)
+        self.kind.append(-1)
+        return False
+
+    def get(self, pos):
+        if self.kind[pos] == 1:
+            return self.pool.strings[self.hi[pos]]
+        h = "%016x%016x" % (self.hi[pos], self.lo[pos])  # str(uuid.UUID(...)), without the object
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+class _StrColumn:
+    """Strings (or None) as ids into the table's string pool."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.ids = array("l")  # -1: None
+
+    def append(self, v) -> bool:
+        if isinstance(v, str):
+            self.ids.append(self.pool.intern(v))
+            return True
+        self.ids.append(-1)
+        return v is None
+
+    def get(self, pos):
+        i = self.ids[pos]
+        return None if i < 0 else self.pool.strings[i]
+
+
+class _NumColumn:
+    """ints and floats (or None) as doubles, remembering which were ints."""
+
+    def __init__(self, pool=None):
+        self.values = array("d")
+        self.kind = array("b")  # 0: float, 1: int, 2: None, -1: placeholder
+
+    def append(self, v) -> bool:
+        if isinstance(v, float):
+            self.values.append(v)
+            self.kind.append(0)
+        elif isinstance(v, int) and not isinstance(v, bool) and -_MAX_EXACT_INT <= v <= _MAX_EXACT_INT:
+            self.values.append(v)
+            self.kind.append(1)
+        elif v is None:
+            self.values.append(0.0)
+            self.kind.append(2)
+        else:
+            self.values.append(0.0)
+            self.kind.append(-1)
+            return False
+        return True
+
+    def get(self, pos):
+        kind = self.kind[pos]
+        if kind == 1:
+            return int(self.values[pos])
+        return None if kind == 2 else self.values[pos]
+
+
+class _BoolColumn:
+    def __init__(self, pool=None):
+        self.values = array("b")  # -1: None or placeholder
+
+    def append(self, v) -> bool:
+        self.values.append(int(v) if isinstance(v, bool) else -1)
+        return v is None or isinstance(v, bool)
+
+    def get(self, pos):
+        v = self.values[pos]
+        return None if v < 0 else bool(v)
+
+
+class _ObjColumn:
+    """Anything, as a plain Python reference (free text, small nested values)."""
+
+    def __init__(self, pool=None):
+        self.values = []
+
+    def append(self, v) -> bool:
+        self.values.append(None if v is MISSING else v)
+        return v is not MISSING
+
+    def get(self, pos):
+        return self.values[pos]
+
+
+class _PointColumn:
+    """{"lat": number, "lon": number} dicts as two number columns."""
+
+    def __init__(self, pool=None):
+        self.lat = _NumColumn()
+        self.lon = _NumColumn()
+
+    def append(self, v) -> bool:
+        if isinstance(v, dict) and len(v) == 2 and "lat" in v and "lon" in v:
+            lat_ok = self.lat.append(v["lat"])
+            lon_ok = self.lon.append(v["lon"])
+            return lat_ok and lon_ok
+        self.lat.append(MISSING)
+        self.lon.append(MISSING)
+        return False
+
+    def get(self, pos):
+        return {"lat": self.lat.get(pos), "lon": self.lon.get(pos)}
+
+
+class _TableColumn:
+    """Lists of dicts as a row range of a child RecordTable."""
+
+    def __init__(self, child):
+        self.child = child
+        self.start = array("l")
+        self.count = array("l")
+
+    def append(self, v) -> bool:
+        self.start.append(len(self.child))
+        if isinstance(v, list) and all(isinstance(item, dict) for item in v):
+            for item in v:
+                self.child.append(item)
+            self.count.append(len(v))
+            return True
+        self.count.append(0)
+        return False
+
+    def get(self, pos):
+        start = self.start[pos]
+        return [self.child[r] for r in range(start, start + self.count[pos])]
+
+    def get_items(self, pos, indexes):
+        start = self.start[pos]
+        return [self.child[start + i] for i in indexes]
+
+
+_COLUMN_KINDS = {
+    "id": _IdColumn,
+    "str": _StrColumn,
+    "num": _NumColumn,
+    "bool": _BoolColumn,
+    "obj": _ObjColumn,
+    "point": _PointColumn,
+}
+
+
+class RecordTable:
+    """
+    Append-only table of dict records, indexable and iterable like a list of dicts.
+    `schema` maps field name to a column kind ("id", "str", "num", "bool", "obj",
+    "point") or, for a list of records, to the nested schema of those records.
+    Nested tables share the parent's string pool.
+    """
+
+    def __init__(self, schema: dict, pool: StringPool = None):
+        self.pool = pool if pool is not None else StringPool()
+        self.fields = tuple(schema)
+        self._field_set = frozenset(schema)
+        columns = tuple(
+            _TableColumn(RecordTable(kind, self.pool)) if isinstance(kind, dict) else _COLUMN_KINDS[kind](self.pool)
+            for kind in schema.values()
+        )
+        self._appenders = tuple((name, column.append) for name, column in zip(self.fields, columns))
+        self._getters = tuple((name, column.get) for name, column in zip(self.fields, columns))
+        self._by_name = dict(zip(self.fields, columns))
+        self._overflow = {}  # row -> {field: original value or MISSING}
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, doc: dict) -> int:
+        """Store `doc` (not kept) as a new row and return the row position. Not thread-safe:
+        callers serialize appends; readers only ever see fully appended rows."""
+        pos = self._size
+        extra = {}
+        for name, append in self._appenders:
+            value = doc.get(name, MISSING)
+            if not append(value):
+                extra[name] = value
+        if not self._field_set.issuperset(doc):
+            for name, value in doc.items():
+                if name not in self._field_set:
+                    extra[name] = value
+        if extra:
+            self._overflow[pos] = extra
+        self._size += 1
+        return pos
+
+    def _check(self, pos: int) -> int:
+        if pos < 0:
+            pos += self._size
+        if not 0 <= pos < self._size:
+            raise IndexError("record index out of range")
+        return pos
+
+    def __getitem__(self, pos: int) -> dict:
+        pos = self._check(pos)
+        extra = self._overflow.get(pos)
+        if extra is None:
+            return {name: get(pos) for name, get in self._getters}
+        doc = {}
+        for name, get in self._getters:
+            value = extra[name] if name in extra else get(pos)
+            if value is not MISSING:
+                doc[name] = value
+        for name, value in extra.items():
+            if name not in self._field_set:
+                doc[name] = value
+        return doc
+
+    def project(self, pos: int, names) -> dict:
+        """Row `pos` decoded with only the given schema fields (those it has)."""
+        pos = self._check(pos)
+        extra = self._overflow.get(pos)
+        if extra is None:
+            return {name: self._by_name[name].get(pos) for name in names}
+        doc = {}
+        for name in names:
+            value = extra[name] if name in extra else self._by_name[name].get(pos)
+            if value is not MISSING:
+                doc[name] = value
+        return doc
+
+    def items_at(self, pos: int, name: str, indexes) -> list:
+        """Elements `indexes` of the record list in field `name` of row `pos`, decoding only those."""
+        pos = self._check(pos)
+        extra = self._overflow.get(pos)
+        if extra is not None and name in extra:
+            items = extra[name]
+            return [items[i] for i in indexes]
+        return self._by_name[name].get_items(pos, indexes)
+
+    def __iter__(self):
+        for pos in range(self._size):
+            yield self[pos]
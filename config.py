@@ -5,6 +5,37 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 UPLOAD_FOLDER = os.path.join(BASE_DIR, 'static', 'uploads')
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
+# Keep disease uploads on disk (served at /static/uploads); by default they are analysed in memory only
+PERSIST_UPLOADS = os.environ.get('AGRI_PERSIST_UPLOADS', '0') == '1'
+# Longest image side used for disease analysis; larger photos are decoded/reduced to fit (0 = full resolution)
+MAX_ANALYSIS_SIDE = int(os.environ.get('AGRI_MAX_ANALYSIS_SIDE', '512'))
+# Disease predictions cached by image content hash (entries; 0 disables)
+PREDICTION_CACHE_SIZE = int(os.environ.get('AGRI_PREDICTION_CACHE_SIZE', '256'))
+# Batch disease prediction: worker processes (0 = one per CPU) and images per request
+DISEASE_POOL_WORKERS = int(os.environ.get('AGRI_DISEASE_POOL_WORKERS', '0'))
+DISEASE_BATCH_MAX_FILES = int(os.environ.get('AGRI_DISEASE_BATCH_MAX_FILES', '500'))
+# Request size cap for a batch (replaces MAX_CONTENT_LENGTH there), in MB
+DISEASE_BATCH_MAX_MB = int(os.environ.get('AGRI_DISEASE_BATCH_MAX_MB', '128'))
+# Asynchronous disease jobs: worker threads and queued jobs accepted before returning 429
+DISEASE_JOB_WORKERS = int(os.environ.get('AGRI_DISEASE_JOB_WORKERS', '2'))
+DISEASE_JOB_QUEUE_SIZE = int(os.environ.get('AGRI_DISEASE_JOB_QUEUE_SIZE', '100'))
+# Sellers, surveys, notifications and deliveries: 'sqlite' (durable, shared by all workers) or 'memory'
+STORAGE_BACKEND = os.environ.get('AGRI_STORAGE', 'sqlite')
+STORAGE_PATH = os.environ.get('AGRI_STORAGE_PATH', os.path.join(BASE_DIR, 'data', 'agri.db'))
+# Stage transitions accepted by one /api/delivery/bulk call
+DELIVERY_BULK_MAX = int(os.environ.get('AGRI_DELIVERY_BULK_MAX', '10000'))
+# Expose /debug/profile to cProfile the next requests of one route (keep off in production)
+PROFILING = os.environ.get('AGRI_PROFILING', '0') == '1'
+# Feature blueprints served by app.create_app() by default, comma-separated (empty = all):
+# crops, disease, market, surveys, delivery
+ENABLED_FEATURES = [f.strip() for f in os.environ.get('AGRI_FEATURES', '').split(',') if f.strip()]
+# Cached responses of the pure endpoints (crop, fertilizer, cultivation, sample images): entries
+# per worker (0 disables), lifetime in seconds, and an optional SQLite file shared by all workers
+RESPONSE_CACHE_SIZE = int(os.environ.get('AGRI_RESPONSE_CACHE_SIZE', '2048'))
+RESPONSE_CACHE_TTL = float(os.environ.get('AGRI_RESPONSE_CACHE_TTL', '300'))
+RESPONSE_CACHE_SHARED = os.environ.get('AGRI_RESPONSE_CACHE_SHARED', '')
+# Default time budget for /api/match mode=allocate (milliseconds)
+MATCH_ALLOCATE_BUDGET_MS = float(os.environ.get('AGRI_MATCH_ALLOCATE_BUDGET_MS', '2000'))
 
 def ensure_upload_dir():
     os.makedirs(UPLOAD_FOLDER, exist_ok=True)
@@ -1,7 +1,10 @@
 """
 Rule-based crop recommendation based on soil, previous crop, season, water.
 Suitable for hackathon demo; can be replaced with ML model later.
+The input space is small, so every (season, water, previous-crop family) answer is
+precomputed at import and a request is a normalization plus one dict lookup.
 """
+import functools
 
 # Soil color -> general type
 SOIL_TYPES = {
@@ -36,19 +39,15 @@ CROP_FAMILIES = {
     "cotton": "malvaceae", "mustard": "brassicaceae", "potato": "solanaceae", "onion": "alliaceae",
 }
 
+@functools.lru_cache(maxsize=4096)
 def get_family(crop_key):
     for k, v in CROP_FAMILIES.items():
         if k in crop_key or crop_key in k:
             return v
     return None
 
-def recommend_crops(soil_color: str, previous_crop: str, season: str, water_availability: str) -> dict:
-    soil_color = (soil_color or "").strip().lower()
-    previous_crop = (previous_crop or "").strip().lower().replace(" ", "_")
-    season = (season or "").strip().lower()
-    water_availability = (water_availability or "medium").strip().lower()
-
-    avoid_family = get_family(previous_crop)
+def _rank_crops(season: str, water_availability: str, avoid_family) -> list:
+    """Top crop keys for normalized season/water and the previous crop's family (rule scoring)."""
     season_list = SEASON_CROPS.get(season, list(SEASON_CROPS.get("kharif", [])) + list(SEASON_CROPS.get("rabi", [])))
     water_list = WATER_CROPS.get(water_availability, WATER_CROPS["medium"])
 
@@ -69,9 +68,44 @@ def recommend_crops(soil_color: str, previous_crop: str, season: str, water_avai
     recommended = sorted(candidates.keys(), key=lambda x: -candidates[x])[:5]
     if not recommended:
         recommended = ["wheat", "chickpea", "mustard", "lentil", "barley"]
+    return recommended
+
+def _build_crop_table() -> dict:
+    """(season or None, water, previous-crop family or None) -> prebuilt recommended_crops.
+    Unknown seasons share the None entry and unknown water levels resolve to "medium"."""
+    table = {}
+    for season in list(SEASON_CROPS) + [None]:
+        for water in WATER_CROPS:
+            for family in sorted(set(CROP_FAMILIES.values())) + [None]:
+                recommended = _rank_crops(season, water, family)
+                table[(season, water, family)] = tuple(
+                    {"name": c.replace("_", " ").title(), "key": c} for c in recommended
+                )
+    return table
+
+_CROP_TABLE = _build_crop_table()
+
+def normalize_inputs(soil_color: str, previous_crop: str, season: str, water_availability: str) -> tuple:
+    """The lowercase/underscore forms recommend_crops works on; its output depends only on these."""
+    return (
+        (soil_color or "").strip().lower(),
+        (previous_crop or "").strip().lower().replace(" ", "_"),
+        (season or "").strip().lower(),
+        (water_availability or "medium").strip().lower(),
+    )
+
+def recommend_crops(soil_color: str, previous_crop: str, season: str, water_availability: str) -> dict:
+    soil_color, previous_crop, season, water_availability = normalize_inputs(
+        soil_color, previous_crop, season, water_availability
+    )
 
+    key = (
+        season if season in SEASON_CROPS else None,
+        water_availability if water_availability in WATER_CROPS else "medium",
+        get_family(previous_crop),
+    )
     return {
-        "recommended_crops": [{"name": c.replace("_", " ").title(), "key": c} for c in recommended],
+        "recommended_crops": [dict(c) for c in _CROP_TABLE[key]],
         "soil_type": SOIL_TYPES.get(soil_color, "general"),
         "message": f"Based on {soil_color or 'your'} soil, previous crop ({previous_crop or 'none'}), {season} season, and {water_availability} water availability."
     }
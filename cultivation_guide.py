@@ -1,29 +1,63 @@
 """
 Step-by-step crop production guidance. Returns procedures for any crop.
+Guides are compiled once at import into immutable step tuples and pre-serialized JSON;
+crops without overrides share the generic guide.
 """
+import functools
+import hashlib
+import json
+from types import MappingProxyType
 
-def get_cultivation_steps(crop_key: str) -> list:
-    crop = (crop_key or "").strip().lower().replace(" ", "_")
-    # Generic steps; can be overridden per crop
-    generic = [
-        {"step": 1, "title": "Land Preparation", "description": "Plough the field 2-3 times, level the land, and add well-decomposed FYM or compost. Ensure proper drainage.", "duration": "1-2 weeks", "image_hint": "land_preparation"},
-        {"step": 2, "title": "Seed Selection & Treatment", "description": "Choose certified seeds. Treat seeds with recommended fungicide/insecticide if needed. Soak if required for the crop.", "duration": "1-2 days", "image_hint": "seeds"},
-        {"step": 3, "title": "Sowing", "description": "Sow at recommended spacing and depth. Follow row spacing and plant population for the variety.", "duration": "1-3 days", "image_hint": "sowing"},
-        {"step": 4, "title": "Irrigation", "description": "Provide first irrigation at right time. Follow critical irrigation stages for the crop.", "duration": "Throughout", "image_hint": "irrigation"},
-        {"step": 5, "title": "Weed & Nutrient Management", "description": "Apply recommended herbicides or manual weeding. Apply fertilizers in splits as per schedule.", "duration": "As per schedule", "image_hint": "fertilizer"},
-        {"step": 6, "title": "Pest & Disease Control", "description": "Monitor for pests and diseases. Use IPM and recommended pesticides only when needed.", "duration": "As needed", "image_hint": "pest_control"},
-        {"step": 7, "title": "Harvesting", "description": "Harvest at correct maturity. Use proper methods to avoid damage and post-harvest losses.", "duration": "1-2 weeks", "image_hint": "harvest"},
-        {"step": 8, "title": "Post-Harvest & Storage", "description": "Dry, clean, and store in moisture-proof conditions. Follow safe storage practices.", "duration": "Ongoing", "image_hint": "storage"},
-    ]
-    # Crop-specific overrides (short descriptions)
-    overrides = {
-        "rice": [{"step": 1, "title": "Puddling", "description": "Puddle the field and maintain standing water. Level for uniform water depth."}],
-        "wheat": [{"step": 1, "title": "Seed Bed", "description": "Prepare fine tilth. Ensure moisture at sowing."}],
-        "potato": [{"step": 2, "title": "Seed Tuber", "description": "Use disease-free cut tubers; treat with fungicide."}],
-    }
-    steps = list(generic)
-    for ov in overrides.get(crop, []):
+# Generic steps; can be overridden per crop
+GENERIC_STEPS = [
+    {"step": 1, "title": "Land Preparation", "description": "Plough the field 2-3 times, level the land, and add well-decomposed FYM or compost. Ensure proper drainage.", "duration": "1-2 weeks", "image_hint": "land_preparation"},
+    {"step": 2, "title": "Seed Selection & Treatment", "description": "Choose certified seeds. Treat seeds with recommended fungicide/insecticide if needed. Soak if required for the crop.", "duration": "1-2 days", "image_hint": "seeds"},
+    {"step": 3, "title": "Sowing", "description": "Sow at recommended spacing and depth. Follow row spacing and plant population for the variety.", "duration": "1-3 days", "image_hint": "sowing"},
+    {"step": 4, "title": "Irrigation", "description": "Provide first irrigation at right time. Follow critical irrigation stages for the crop.", "duration": "Throughout", "image_hint": "irrigation"},
+    {"step": 5, "title": "Weed & Nutrient Management", "description": "Apply recommended herbicides or manual weeding. Apply fertilizers in splits as per schedule.", "duration": "As per schedule", "image_hint": "fertilizer"},
+    {"step": 6, "title": "Pest & Disease Control", "description": "Monitor for pests and diseases. Use IPM and recommended pesticides only when needed.", "duration": "As needed", "image_hint": "pest_control"},
+    {"step": 7, "title": "Harvesting", "description": "Harvest at correct maturity. Use proper methods to avoid damage and post-harvest losses.", "duration": "1-2 weeks", "image_hint": "harvest"},
+    {"step": 8, "title": "Post-Harvest & Storage", "description": "Dry, clean, and store in moisture-proof conditions. Follow safe storage practices.", "duration": "Ongoing", "image_hint": "storage"},
+]
+
+# Crop-specific overrides (short descriptions)
+CROP_OVERRIDES = {
+    "rice": [{"step": 1, "title": "Puddling", "description": "Puddle the field and maintain standing water. Level for uniform water depth."}],
+    "wheat": [{"step": 1, "title": "Seed Bed", "description": "Prepare fine tilth. Ensure moisture at sowing."}],
+    "potato": [{"step": 2, "title": "Seed Tuber", "description": "Use disease-free cut tubers; treat with fungicide."}],
+}
+
+
+def _normalize(crop_key: str) -> str:
+    return (crop_key or "").strip().lower().replace(" ", "_")
+
+def _compile(crop: str) -> tuple:
+    steps = list(GENERIC_STEPS)
+    for ov in CROP_OVERRIDES.get(crop, []):
         s = ov.get("step")
         if 1 <= s <= len(steps):
             steps[s - 1] = {**steps[s - 1], **ov}
-    return steps
+    return tuple(steps)
+
+def _dumps(obj) -> str:
+    # Sorted keys and compact separators, as Flask's jsonify outside debug mode
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"))
+
+# None holds the generic guide shared by every crop without overrides
+_compiled = {crop: _compile(crop) for crop in list(CROP_OVERRIDES) + [None]}
+_GUIDE_JSON = {"en": {crop: _dumps(list(steps)) for crop, steps in _compiled.items()}}
+_GUIDES = {crop: tuple(MappingProxyType(s) for s in steps) for crop, steps in _compiled.items()}
+
+def get_cultivation_steps(crop_key: str) -> list:
+    crop = _normalize(crop_key)
+    return [dict(s) for s in _GUIDES.get(crop, _GUIDES[None])]
+
+@functools.lru_cache(maxsize=1024)
+def get_cultivation_payload(crop_key: str, lang: str = "en") -> tuple:
+    """Serialized {"crop", "steps"} response body and its strong ETag, built from the precompiled guide.
+    Languages without their own guide text get the English one."""
+    crop = _normalize(crop_key)
+    by_crop = _GUIDE_JSON.get((lang or "en").strip().lower()[:2], _GUIDE_JSON["en"])
+    steps_json = by_crop.get(crop, by_crop[None])
+    body = f'{{"crop":{json.dumps(crop_key)},"steps":{steps_json}}}\n'.encode()
+    return body, hashlib.sha256(body).hexdigest()[:32]
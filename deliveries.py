@@ -0,0 +1,126 @@
+"""
+Delivery records keyed by tracking id, with secondary indexes on status, origin and
+destination. Each index keeps its tracking ids sorted, so filtered listings page by
+keyset (tracking ids after the cursor) and stay stable while records change.
+"""
+import bisect
+import re
+import threading
+
+INDEXED_FIELDS = ("status", "origin", "destination")
+
+
+def _index_value(value) -> str:
+    return str(value or "").strip().lower()
+
+
+def stages_valid(stages) -> bool:
+    """Stages are a list of {"name": str, ...} objects."""
+    return isinstance(stages, list) and all(isinstance(s, dict) and isinstance(s.get("name"), str) for s in stages)
+
+
+def stage_status(stage_name: str) -> str:
+    """'In transit' -> 'in_transit' (the status a shipment gets on reaching that stage)."""
+    return re.sub(r"[^a-z0-9]+", "_", stage_name.strip().lower()).strip("_")
+
+
+class DeliveryIndex:
+    def __init__(self):
+        self.records = {}  # tracking_id -> record
+        self._all = []  # sorted tracking ids
+        self._index = {field: {} for field in INDEXED_FIELDS}  # field -> value -> sorted ids
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _insert(ids, tid):
+        i = bisect.bisect_left(ids, tid)
+        if i == len(ids) or ids[i] != tid:
+            ids.insert(i, tid)
+
+    @staticmethod
+    def _remove(ids, tid):
+        i = bisect.bisect_left(ids, tid)
+        if i < len(ids) and ids[i] == tid:
+            del ids[i]
+
+    def put(self, tid: str, record: dict) -> dict:
+        tid = str(tid)
+        with self._lock:
+            old = self.records.get(tid)
+            if old is None:
+                self._insert(self._all, tid)
+            for field in INDEXED_FIELDS:
+                value = _index_value(record.get(field))
+                if old is not None:
+                    old_value = _index_value(old.get(field))
+                    if old_value == value:
+                        continue
+                    ids = self._index[field][old_value]
+                    self._remove(ids, tid)
+                    if not ids:
+                        del self._index[field][old_value]
+                self._insert(self._index[field].setdefault(value, []), tid)
+            self.records[tid] = record
+        return record
+
+    def get(self, tid: str):
+        return self.records.get(tid)
+
+    def query(self, filters: dict = None, cursor: str = None, limit: int = 100):
+        """Records matching every field in `filters` (case-insensitive exact match), ordered by
+        tracking id, starting after `cursor`. Returns (records, next cursor or None)."""
+        wanted = {f: _index_value(v) for f, v in (filters or {}).items() if v is not None}
+        with self._lock:
+            if wanted:
+                # Walk the most selective index and check the remaining fields per record
+                ids = min((self._index[f].get(v, []) for f, v in wanted.items()), key=len)
+            else:
+                ids = self._all
+            start = bisect.bisect_right(ids, cursor) if cursor else 0
+            page = []
+            for pos in range(start, len(ids)):
+                rec = self.records[ids[pos]]
+                if all(_index_value(rec.get(f)) == v for f, v in wanted.items()):
+                    page.append(rec)
+                    if len(page) > limit:
+                        break
+        if len(page) > limit:
+            page.pop()
+            return page, page[-1]["tracking_id"]
+        return page, None
+
+    def counts(self, field: str = "status") -> dict:
+        with self._lock:
+            return {value: len(ids) for value, ids in self._index[field].items()}
+
+    def plan_transitions(self, updates: list):
+        """
+        Validate stage transitions [{"tracking_id", "stage", "status"?}] against the current
+        records. Returns (new records, errors); nothing should be written if errors is non-empty.
+        Reaching a stage marks it and every earlier stage done and later ones not done; the
+        status defaults to the stage name (e.g. 'Delivered' -> 'delivered').
+        """
+        planned, errors = {}, []
+        with self._lock:
+            for i, u in enumerate(updates):
+                tid = u.get("tracking_id")
+                if u.get("status") is not None and not isinstance(u["status"], str):
+                    errors.append({"index": i, "tracking_id": tid, "error": "status must be a string"})
+                    continue
+                stage = str(u.get("stage") or "").strip().lower()
+                rec = planned.get(tid) or self.records.get(tid)
+                if rec is None:
+                    errors.append({"index": i, "tracking_id": tid, "error": "unknown tracking_id"})
+                    continue
+                if not stages_valid(rec.get("stages", [])):
+                    errors.append({"index": i, "tracking_id": tid, "error": "shipment has malformed stages"})
+                    continue
+                names = [s["name"].strip().lower() for s in rec.get("stages", [])]
+                if stage not in names:
+                    errors.append({"index": i, "tracking_id": tid, "error": f"unknown stage: {u.get('stage')}"})
+                    continue
+                reached = names.index(stage)
+                stages = [dict(s, done=j <= reached) for j, s in enumerate(rec["stages"])]
+                status = u.get("status") or stage_status(rec["stages"][reached]["name"])
+                planned[tid] = dict(rec, stages=stages, status=status)
+        return planned, errors
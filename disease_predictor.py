@@ -1,10 +1,20 @@
 """
 Lightweight disease prediction from image.
 For hackathon: uses image stats + placeholder labels; replace with real model (e.g. ResNet) for production.
+Pillow, numpy and the process pool are imported on first use, so importing this module stays cheap.
 """
+import copy
+import hashlib
+import io
+import json
 import os
-from PIL import Image
-import numpy as np
+import threading
+from collections import OrderedDict, deque
+
+from backend.config import MAX_ANALYSIS_SIDE, PREDICTION_CACHE_SIZE, DISEASE_POOL_WORKERS
+
+# Bump when the analysis changes so cached predictions from the old model are not reused
+MODEL_VERSION = "heuristic-1"
 
 # Demo labels for different "signatures" (by dominant color / simple stats)
 DISEASE_LABELS = [
@@ -16,9 +26,130 @@ DISEASE_LABELS = [
     {"id": "yellowing", "name": "Nutrient Deficiency / Yellowing", "confidence": 0.68, "remedy": "Soil test; apply balanced NPK and micronutrients."},
 ]
 
-def predict_disease_from_image(image_path: str) -> dict:
-    """Analyze image and return a demo disease prediction. Replace with real CNN inference."""
-    if not image_path or not os.path.isfile(image_path):
+def _labels_fingerprint() -> str:
+    return hashlib.sha256(json.dumps(DISEASE_LABELS, sort_keys=True).encode()).hexdigest()
+
+class PredictionCache:
+    """
+    Bounded LRU of prediction results keyed by (image content hash, model version, max_side).
+    All entries are dropped when DISEASE_LABELS changes, or on `invalidate()`.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._labels = _labels_fingerprint()
+        self._lock = threading.Lock()
+
+    def _check_labels(self):
+        labels = _labels_fingerprint()
+        if labels != self._labels:
+            self._entries.clear()
+            self._labels = labels
+
+    def get(self, key):
+        with self._lock:
+            self._check_labels()
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(result)
+
+    def put(self, key, result: dict):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = copy.deepcopy(result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._labels = _labels_fingerprint()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "model_version": MODEL_VERSION,
+            }
+
+prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE)
+
+def _has_image(image) -> bool:
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return len(image) > 0
+    if hasattr(image, "read"):
+        return True
+    return bool(image) and os.path.isfile(image)
+
+def _open_image(image):
+    """Open a path, raw bytes or binary file object with Pillow, decoding bytes in memory."""
+    from PIL import Image
+
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return Image.open(io.BytesIO(image))
+    return Image.open(image)
+
+def _load_for_analysis(image, max_side: int):
+    """Decode to RGB with the longest side at most max_side. For JPEGs, thumbnail() sets up a
+    draft decode (DCT scaling), so a large photo is never materialised at full resolution."""
+    from PIL import Image
+
+    img = _open_image(image)
+    if max_side and max(img.size) > max_side:
+        img.thumbnail((max_side, max_side), Image.Resampling.BOX)
+    return img.convert("RGB")
+
+def _read_bytes(image) -> bytes:
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return bytes(image)
+    if hasattr(image, "read"):
+        return image.read()
+    with open(image, "rb") as f:
+        return f.read()
+
+def predict_disease_from_image(image, max_side: int = None) -> dict:
+    """Analyze image and return a demo disease prediction. Replace with real CNN inference.
+    `image` may be a file path, the uploaded bytes, or a binary file object.
+    `max_side` caps the analysis resolution (default config.MAX_ANALYSIS_SIDE, 0 = full size).
+    Results are cached by content hash, so re-uploads of the same photo skip the analysis."""
+    if max_side is None:
+        max_side = MAX_ANALYSIS_SIDE
+    if not _has_image(image) or prediction_cache.max_entries <= 0:
+        return _analyse(image, max_side)
+    data = _read_bytes(image)
+    key = (hashlib.sha256(data).hexdigest(), MODEL_VERSION, max_side)
+    result = prediction_cache.get(key)
+    if result is None:
+        result = _analyse(data, max_side)
+        if result["prediction"] != "error":
+            prediction_cache.put(key, result)
+    return result
+
+class AnalysisError(Exception):
+    """An image could not be analysed (see predict_disease_or_raise)."""
+
+def predict_disease_or_raise(image, max_side: int = None) -> dict:
+    """predict_disease_from_image for job queues: an "error" prediction (undecodable image,
+    analysis failure) raises AnalysisError with its message instead of returning a result."""
+    result = predict_disease_from_image(image, max_side)
+    if result["prediction"] == "error":
+        raise AnalysisError(result["remedy"] or result["label"])
+    return result
+
+def _analyse(image, max_side: int) -> dict:
+    if not _has_image(image):
         return {
             "prediction": "unknown",
             "label": "No image",
@@ -27,8 +158,10 @@ def predict_disease_from_image(image_path: str) -> dict:
             "all_predictions": []
         }
     try:
-        img = Image.open(image_path).convert("RGB")
-        arr = np.array(img)
+        import numpy as np
+
+        img = _load_for_analysis(image, max_side)
+        arr = np.asarray(img)
         # Simple heuristic: mean and std to pick a demo label
         r, g, b = arr[:,:,0].mean(), arr[:,:,1].mean(), arr[:,:,2].mean()
         idx = int((r + g + b) / 3) % len(DISEASE_LABELS)
@@ -52,3 +185,78 @@ def predict_disease_from_image(image_path: str) -> dict:
             "remedy": str(e),
             "all_predictions": []
         }
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _pool_workers() -> int:
+    return DISEASE_POOL_WORKERS or os.cpu_count() or 1
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+            _pool = ProcessPoolExecutor(max_workers=_pool_workers())
+        return _pool
+
+def _outcome(fut) -> dict:
+    try:
+        return fut.result()
+    except Exception as e:  # worker crashed or pool broken
+        return {"prediction": "error", "label": "Analysis failed", "confidence": 0,
+                "remedy": str(e) or type(e).__name__, "all_predictions": []}
+
+def predict_disease_batch(images: list, max_side: int = None) -> list:
+    """
+    Predict many images (bytes, paths or binary file objects) at once, decoding and analysing
+    them across a process pool so CPU-bound work is not serialized by the GIL. Images are read
+    one at a time and at most two per worker are in flight, so a large batch is never held in
+    memory all at once. Returns one result per image in input order; identical images are
+    analysed once and cache hits skip the pool.
+    """
+    if max_side is None:
+        max_side = MAX_ANALYSIS_SIDE
+    results = [None] * len(images)
+    positions = {}  # cache key -> [positions]
+    outcomes = {}
+    first = None  # the first image to analyse waits, so a batch with only one runs in-process
+    in_flight = deque()  # (cache key, future), oldest first
+    pool = None
+    for i, image in enumerate(images):
+        data = _read_bytes(image)
+        if not data:
+            results[i] = _analyse(data, max_side)
+            continue
+        key = (hashlib.sha256(data).hexdigest(), MODEL_VERSION, max_side)
+        if key in positions:
+            positions[key].append(i)
+            continue
+        cached = prediction_cache.get(key)
+        if cached is not None:
+            results[i] = cached
+            continue
+        positions[key] = [i]
+        if first is None and pool is None:
+            first = (key, data)
+            continue
+        if pool is None:
+            pool = _get_pool()
+            in_flight.append((first[0], pool.submit(_analyse, first[1], max_side)))
+            first = None
+        while len(in_flight) >= 2 * _pool_workers():
+            done_key, fut = in_flight.popleft()
+            outcomes[done_key] = _outcome(fut)
+        in_flight.append((key, pool.submit(_analyse, data, max_side)))
+    if first is not None:
+        outcomes[first[0]] = _analyse(first[1], max_side)
+    for key, fut in in_flight:
+        outcomes[key] = _outcome(fut)
+
+    for key, at in positions.items():
+        result = outcomes[key]
+        if result["prediction"] != "error":
+            prediction_cache.put(key, result)
+        for i in at:
+            results[i] = copy.deepcopy(result)
+    return results
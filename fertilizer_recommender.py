@@ -1,6 +1,12 @@
 """
 Fertilizer recommendations by crop and optional disease.
+Crop and disease names resolve through precompiled KeyIndex lookups instead of scanning
+the tables, so larger catalogues (see load_catalogue) do not slow each request.
 """
+import functools
+import json
+import os
+from array import array
 
 CROP_FERTILIZERS = {
     "rice": ["Urea", "DAP", "MOP", "Zinc Sulphate", "Farmyard Manure"],
@@ -47,26 +53,154 @@ DISEASE_FERTILIZERS = {
     "healthy": [],
 }
 
+class KeyIndex:
+    """
+    Resolves a query to the first table key (in table order) with `key in query or query in key`,
+    without scanning the table:
+      - query inside a key: the suffixes of all keys are kept sorted (a suffix array), so the
+        suffixes starting with the query form one range, and a min-tree over it gives the
+        earliest key in that range;
+      - key inside the query: an Aho-Corasick automaton over the keys finds the earliest key
+        occurring in the query in one pass over the query's characters.
+    Both are linear in the total length of the keys. Results are memoized per query.
+    """
+
+    SEP = "\0"  # ends every key in the suffix text; sorts before any other character
+
+    def __init__(self, keys, memo_size: int = 4096):
+        self._order = {}
+        for k in keys:
+            self._order.setdefault(k, len(self._order))
+        self._keys = list(self._order)
+        self._build_suffix_array()
+        self._build_automaton()
+        self.resolve = functools.lru_cache(maxsize=memo_size)(self._resolve)
+
+    def _build_suffix_array(self):
+        self._text = self.SEP.join(self._keys) + self.SEP
+        suffixes, start = [], 0
+        for order, k in enumerate(self._keys):
+            end = start + len(k) + 1
+            suffixes.extend((self._text[i:end], order, i) for i in range(start, end - 1))
+            start = end
+        suffixes.sort()
+        self._suffixes = array("q", (i for _, _, i in suffixes))
+        # min-tree over the key order of each sorted suffix: leaves at n..2n-1, node i = min(2i, 2i+1)
+        n = len(suffixes)
+        tree = array("q", [len(self._keys)]) * n + array("q", (order for _, order, _ in suffixes))
+        for i in range(n - 1, 0, -1):
+            tree[i] = min(tree[2 * i], tree[2 * i + 1])
+        self._min_tree = tree
+
+    def _first_containing(self, query: str) -> int:
+        """Order of the earliest key containing `query` (len(keys) if none)."""
+        never = len(self._keys)
+        if self.SEP in query:
+            return next((o for o, k in enumerate(self._keys) if query in k), never)
+        text, sa, m = self._text, self._suffixes, len(query)
+        # Truncated to len(query), the sorted suffixes stay sorted: find the run equal to the query
+        lo, hi = 0, len(sa)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if text[sa[mid]:sa[mid] + m] < query:
+                lo = mid + 1
+            else:
+                hi = mid
+        first, hi = lo, len(sa)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if text[sa[mid]:sa[mid] + m] == query:
+                lo = mid + 1
+            else:
+                hi = mid
+        best, tree, n = never, self._min_tree, len(sa)
+        lo, hi = first + n, lo + n
+        while lo < hi:
+            if lo & 1:
+                best = min(best, tree[lo])
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                best = min(best, tree[hi])
+            lo //= 2
+            hi //= 2
+        return best
+
+    def _build_automaton(self):
+        # Trie edges live in one dict keyed by node << 21 | code point, not a dict per node
+        never = len(self._keys)
+        goto, depth, best = {}, array("q", [0]), array("q", [never])
+        edges = []  # (depth of child, parent, code point, child)
+        for k, order in self._order.items():
+            node = 0
+            for ch in k:
+                edge = node << 21 | ord(ch)
+                child = goto.get(edge)
+                if child is None:
+                    child = goto[edge] = len(depth)
+                    depth.append(depth[node] + 1)
+                    best.append(never)
+                    edges.append((depth[child], node, ord(ch), child))
+                node = child
+            best[node] = min(best[node], order)
+        fail = array("q", [0]) * len(depth)
+        edges.sort()  # breadth-first: a node's failure link is always shallower than the node
+        for _, u, c, v in edges:
+            if u:
+                f = fail[u]
+                while f and (f << 21 | c) not in goto:
+                    f = fail[f]
+                fail[v] = goto.get(f << 21 | c, 0)
+            best[v] = min(best[v], best[fail[v]])  # keys ending at v's longest proper suffix
+        self._goto, self._fail, self._best = goto, fail, best
+
+    def _resolve(self, query: str):
+        best_order = min(self._first_containing(query), self._best[0])  # an empty key occurs in every query
+        goto, fail, ends = self._goto, self._fail, self._best
+        node = 0
+        for ch in query:
+            c = ord(ch)
+            while node and (node << 21 | c) not in goto:
+                node = fail[node]
+            node = goto.get(node << 21 | c, 0)
+            if ends[node] < best_order:
+                best_order = ends[node]
+        return self._keys[best_order] if best_order < len(self._keys) else None
+
+_crop_index = KeyIndex(CROP_FERTILIZERS)
+_disease_index = KeyIndex(DISEASE_FERTILIZERS)
+
+def load_catalogue(path: str):
+    """Replace the fertilizer tables from a JSON file {"crops": {name: [...]}, "diseases": {name: [...]}}.
+    Key order in the file is the match priority for partial names."""
+    global CROP_FERTILIZERS, DISEASE_FERTILIZERS, _crop_index, _disease_index
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    crops = data.get("crops", CROP_FERTILIZERS)
+    diseases = data.get("diseases", DISEASE_FERTILIZERS)
+    crop_index, disease_index = KeyIndex(crops), KeyIndex(diseases)
+    CROP_FERTILIZERS, DISEASE_FERTILIZERS = crops, diseases
+    _crop_index, _disease_index = crop_index, disease_index
+
+if os.environ.get("AGRI_FERTILIZER_CATALOGUE"):
+    load_catalogue(os.environ["AGRI_FERTILIZER_CATALOGUE"])
+
 def normalize_crop(s):
     return (s or "").strip().lower().replace(" ", "_")
 
 def recommend_fertilizers(crop: str, disease_detected: str = None) -> dict:
     crop_key = normalize_crop(crop)
-    base = None
-    for k, v in CROP_FERTILIZERS.items():
-        if k in crop_key or crop_key in k:
-            base = v
-            break
+    k = _crop_index.resolve(crop_key)
+    base = CROP_FERTILIZERS[k] if k is not None else None
     if not base:
         base = ["Urea", "DAP", "MOP", "Compost"]
 
     extra = []
     if disease_detected:
         d = (disease_detected or "").strip().lower().replace(" ", "_")
-        for k, v in DISEASE_FERTILIZERS.items():
-            if k in d or d in k:
-                extra = v
-                break
+        k = _disease_index.resolve(d)
+        if k is not None:
+            extra = DISEASE_FERTILIZERS[k]
 
     return {
         "crop": crop,
@@ -1,6 +1,11 @@
 """
 Multi-language support for Agri AI. Local and regional languages.
+Each language's bundle is serialized and gzip-compressed once at import and
+identified by a content hash, so it can be served with ETags and versioned URLs.
 """
+import gzip
+import hashlib
+import json
 
 TRANSLATIONS = {
     "en": {
@@ -149,3 +154,24 @@ def get_text(lang: str, key: str) -> str:
 def get_all_for_lang(lang: str) -> dict:
     lang = (lang or "en").strip().lower()[:2]
     return TRANSLATIONS.get(lang, TRANSLATIONS["en"])
+
+def _build_bundles() -> dict:
+    bundles = {}
+    for lang, texts in TRANSLATIONS.items():
+        body = (json.dumps(texts, ensure_ascii=False, sort_keys=True, separators=(",", ":")) + "\n").encode("utf-8")
+        bundles[lang] = {
+            "body": body,
+            "gzip": gzip.compress(body, compresslevel=9, mtime=0),
+            "version": hashlib.sha256(body).hexdigest()[:16],
+        }
+    return bundles
+
+BUNDLES = _build_bundles()
+
+def get_bundle(lang: str) -> dict:
+    """Pre-serialized bundle for a language: {"body", "gzip", "version"} (falls back to English)."""
+    lang = (lang or "en").strip().lower()[:2]
+    return BUNDLES.get(lang, BUNDLES["en"])
+
+def bundle_versions() -> dict:
+    return {lang: b["version"] for lang, b in BUNDLES.items()}
@@ -0,0 +1,102 @@
+"""
+Bounded in-process job queue for slow analysis work (e.g. disease prediction).
+Submitting returns a job id at once; worker threads run the jobs and clients poll or
+stream the status. A full queue rejects new work instead of piling it up.
+"""
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+FINISHED = ("done", "failed")
+
+
+class QueueFull(Exception):
+    """Raised by JobQueue.submit when max_queued jobs are already waiting."""
+
+
+class JobQueue:
+    def __init__(self, fn, workers: int = 2, max_queued: int = 100, keep_finished: int = 1000):
+        self.fn = fn
+        self.workers = workers
+        self.max_queued = max_queued
+        self.keep_finished = keep_finished
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._jobs = OrderedDict()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._running = 0
+        self._counts = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0}
+
+    def _start_workers(self):
+        while len(self._threads) < self.workers:
+            t = threading.Thread(target=self._work, name=f"job-worker-{len(self._threads)}", daemon=True)
+            self._threads.append(t)
+            t.start()
+
+    def submit(self, *args) -> dict:
+        job = {"job_id": uuid.uuid4().hex, "status": "queued", "submitted_at": time.time(),
+               "started_at": None, "finished_at": None, "result": None, "error": None}
+        with self._cond:
+            self._start_workers()
+            try:
+                self._queue.put_nowait((job, args))
+            except queue.Full:
+                self._counts["rejected"] += 1
+                raise QueueFull(f"{self.max_queued} jobs already queued")
+            self._jobs[job["job_id"]] = job
+            self._counts["submitted"] += 1
+            self._trim()
+            return dict(job)
+
+    def _trim(self):
+        # Drop the oldest finished jobs once more than keep_finished are held
+        finished = [jid for jid, j in self._jobs.items() if j["status"] in FINISHED]
+        for jid in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[jid]
+
+    def _work(self):
+        while True:
+            job, args = self._queue.get()
+            with self._cond:
+                job["status"] = "running"
+                job["started_at"] = time.time()
+                self._running += 1
+                self._cond.notify_all()
+            try:
+                result, error, status = self.fn(*args), None, "done"
+            except Exception as e:
+                result, error, status = None, str(e) or type(e).__name__, "failed"
+            with self._cond:
+                job.update(status=status, result=result, error=error, finished_at=time.time())
+                self._running -= 1
+                self._counts["completed" if status == "done" else "failed"] += 1
+                self._cond.notify_all()
+
+    def get(self, job_id: str):
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def wait(self, job_id: str, seen_status: str = None, timeout: float = 15):
+        """Block until the job's status differs from seen_status (or timeout); return a snapshot."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                job = self._jobs.get(job_id)
+                remaining = deadline - time.monotonic()
+                if job is None or job["status"] != seen_status or remaining <= 0:
+                    return dict(job) if job else None
+                self._cond.wait(remaining)
+
+    def metrics(self) -> dict:
+        with self._cond:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "running": self._running,
+                "workers": self.workers,
+                "max_queued": self.max_queued,
+                "tracked_jobs": len(self._jobs),
+                **self._counts,
+            }
@@ -1,11 +1,22 @@
 """
 Buyer-Seller matching by crop availability, location distance, quality score, budget.
 """
+import heapq
+import itertools
+import math
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from backend.compact import RecordTable
+
+EARTH_RADIUS_KM = 6371
+
 
 def haversine_km(lat1, lon1, lat2, lon2):
     """Approximate distance in km."""
-    import math
-    R = 6371
+    R = EARTH_RADIUS_KM
     phi1, phi2 = math.radians(lat1), math.radians(lat2)
     dphi = math.radians(lat2 - lat1)
     dlam = math.radians(lon2 - lon1)
@@ -13,48 +24,630 @@ def haversine_km(lat1, lon1, lat2, lon2):
     c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
     return R * c
 
-def match_buyers_to_sellers(buyers: list, sellers: list, max_distance_km: float = 200) -> list:
+
+def _is_coord(lat, lon):
+    return (
+        isinstance(lat, (int, float)) and isinstance(lon, (int, float))
+        and -90 <= lat <= 90 and math.isfinite(lon)
+    )
+
+
+# Profiles and requests are free-form JSON: malformed fields read as missing rather than raising
+
+def _num(value, default: float = 0.0) -> float:
+    """float(value), or `default` when it is missing, not a number or not finite."""
+    try:
+        f = float(value)
+    except (TypeError, ValueError):
+        return default
+    return f if math.isfinite(f) else default
+
+
+def _location(obj) -> tuple:
+    """(lat, lon) of a seller or buyer; a missing or malformed location reads as (0, 0)."""
+    loc = obj.get("location") if isinstance(obj, dict) else None
+    if not isinstance(loc, dict):
+        return 0.0, 0.0
+    return _num(loc.get("lat", 0)), _num(loc.get("lon", 0))
+
+
+def _offers(seller) -> list:
+    crops = seller.get("crops") if isinstance(seller, dict) else None
+    return crops if isinstance(crops, list) else []
+
+
+def _offer_name(offer) -> str:
+    return str(offer.get("name") or "").strip().lower()
+
+
+def _offer_terms(offer):
+    """(normalized name, quantity, unit price, quality) of an offer, or None if it is not an object."""
+    if not isinstance(offer, dict):
+        return None
+    return (
+        _offer_name(offer),
+        _num(offer.get("quantity") or 0),
+        _num(offer.get("unit_price") or 0),
+        _num(offer.get("quality_score") or 0),
+    )
+
+
+class GeoGridIndex:
+    """
+    Fixed lat/lon grid over points, for radius queries without a full scan.
+    Points are stored by insertion position. `query` returns every position whose
+    cell touches the query's bounding box (a superset of the real hits) in insertion
+    order; callers still apply the exact haversine check.
+    """
+
+    def __init__(self, cell_deg: float = 1.0):
+        self._ncols = max(1, int(round(360 / cell_deg)))
+        self.cell_deg = 360 / self._ncols
+        self._cells = {}
+        self._unplaced = []  # odd/missing coordinates: always returned as candidates
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _cell(self, lat, lon):
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lon / self.cell_deg)) % self._ncols
+
+    def add(self, lat, lon) -> int:
+        pos = self._size
+        self._size += 1
+        if _is_coord(lat, lon):
+            self._cells.setdefault(self._cell(lat, lon), []).append(pos)
+        else:
+            self._unplaced.append(pos)
+        return pos
+
+    def query(self, lat, lon, radius_km) -> list:
+        if not _is_coord(lat, lon) or not isinstance(radius_km, (int, float)) or not math.isfinite(radius_km):
+            return list(range(self._size))
+        if radius_km < 0:
+            return list(self._unplaced)
+        d = radius_km / EARTH_RADIUS_KM  # angular radius
+        if d >= math.pi:
+            return list(range(self._size))
+        dlat = math.degrees(d)
+        lat_lo, lat_hi = max(lat - dlat, -90), min(lat + dlat, 90)
+        # One cell of padding on every side absorbs float error at cell borders.
+        rows = range(int(math.floor(lat_lo / self.cell_deg)) - 1, int(math.floor(lat_hi / self.cell_deg)) + 2)
+        if lat_lo <= -90 or lat_hi >= 90:
+            cols = None  # cap contains a pole: every longitude
+        else:
+            dlon = math.degrees(math.asin(min(1.0, math.sin(d) / math.cos(math.radians(lat)))))
+            c0 = int(math.floor((lon - dlon) / self.cell_deg)) - 1
+            c1 = int(math.floor((lon + dlon) / self.cell_deg)) + 1
+            cols = None if c1 - c0 + 1 >= self._ncols else {c % self._ncols for c in range(c0, c1 + 1)}
+
+        hits = list(self._unplaced)
+        n_cols = self._ncols if cols is None else len(cols)
+        if len(rows) * n_cols > len(self._cells):
+            for (r, c), positions in self._cells.items():
+                if r in rows and (cols is None or c in cols):
+                    hits.extend(positions)
+        else:
+            for r in rows:
+                for c in (range(self._ncols) if cols is None else cols):
+                    hits.extend(self._cells.get((r, c), ()))
+        hits.sort()
+        return hits
+
+
+class SellerIndex:
+    """Spatial index over seller profiles. Build once, then `add` new sellers as they register."""
+
+    def __init__(self, sellers=(), cell_deg: float = 1.0):
+        self.sellers = []
+        self._grid = GeoGridIndex(cell_deg)
+        self._lock = threading.Lock()
+        for s in sellers:
+            self.add(s)
+
+    def __len__(self):
+        return len(self.sellers)
+
+    def add(self, seller: dict):
+        lat, lon = _location(seller)
+        with self._lock:
+            self._grid.add(lat, lon)
+            self.sellers.append(seller)
+
+    def near(self, lat, lon, max_distance_km) -> list:
+        """Sellers that may lie within max_distance_km of (lat, lon), in registration order."""
+        with self._lock:
+            positions = self._grid.query(lat, lon, max_distance_km)
+        return [self.sellers[i] for i in positions]
+
+    def candidates(self, lat, lon, crop_wanted, max_distance_km):
+        """Yield (seller, offers) worth checking for a buyer; offers still need the exact filters."""
+        for s in self.near(lat, lon, max_distance_km):
+            yield s, _offers(s)
+
+    def candidate_rows(self, lat, lon, crop_wanted, max_distance_km):
+        """Like `candidates`, as (seller position, seller, [(offer position, offer)]), so offers
+        have a stable key. The seller has at least its id, name and location."""
+        with self._lock:
+            positions = self._grid.query(lat, lon, max_distance_km)
+        for pos in positions:
+            s = self.sellers[pos]
+            yield pos, s, list(enumerate(_offers(s)))
+
+    def offer_count(self) -> int:
+        return sum(len(_offers(s)) for s in self.sellers)
+
+
+# Record layout of the catalogue's seller table (see backend/compact.py)
+SELLER_SCHEMA = {
+    "id": "id",
+    "name": "str",
+    "location": "point",
+    "crops": {"name": "str", "quantity": "num", "unit_price": "num", "quality_score": "num"},
+}
+SELLER_HEADER = ("id", "name", "location")  # what matching reads from a seller besides its offers
+
+
+class SellerCatalogue(SellerIndex):
+    """
+    Server-side seller catalogue: the spatial index plus a crop index from normalized
+    crop name to offer rows, updated on every `add`. A buyer's crop is resolved against
+    the distinct crop names (an LRU of `memo_size` query strings) rather than every offer; each buyer
+    then walks whichever is smaller, the crop's postings or the nearby sellers from the grid.
+
+    With `compact` (the default), profiles are kept in a columnar RecordTable; a candidate
+    is decoded as its id, name and location plus only the offers that passed the crop index.
+    """
+
+    def __init__(self, sellers=(), cell_deg: float = 1.0, compact: bool = True, memo_size: int = 4096):
+        super().__init__((), cell_deg)
+        if compact:
+            self.sellers = RecordTable(SELLER_SCHEMA)
+        self._postings = {}  # normalized crop name -> offer rows
+        self._name_ids = {}
+        self._resolved = OrderedDict()  # crop_wanted -> matching names, least recently used first
+        self.memo_size = memo_size
+        self._offer_name = array("l")  # offer row -> normalized name id
+        self._offer_seller = array("l")  # offer row -> seller position
+        self._offer_start = array("l", [0])  # seller position -> first offer row, plus an end sentinel
+        self._lat = array("d")  # seller position -> coordinates (NaN when not a valid point)
+        self._lon = array("d")
+        for s in sellers:
+            self.add(s)
+
+    def add(self, seller: dict):
+        lat, lon = _location(seller)
+        # Offers that are not objects keep their row (offer positions stay aligned) but no posting
+        names = [_offer_name(offer) if isinstance(offer, dict) else None for offer in _offers(seller)]
+        with self._lock:
+            pos = self._grid.add(lat, lon)
+            self.sellers.append(seller)
+            valid = _is_coord(lat, lon)
+            self._lat.append(lat if valid else math.nan)
+            self._lon.append(lon if valid else math.nan)
+            row = self._offer_start[-1]
+            for cname in names:
+                if cname is None:
+                    name_id = -1
+                else:
+                    name_id = self._name_ids.get(cname)
+                    if name_id is None:
+                        name_id = self._name_ids[cname] = len(self._name_ids)
+                        self._postings[cname] = array("l")
+                        self._resolved.clear()  # a new name may match cached queries
+                    self._postings[cname].append(row)
+                self._offer_name.append(name_id)
+                self._offer_seller.append(pos)
+                row += 1
+            self._offer_start.append(row)
+
+    def offer_count(self) -> int:
+        return self._offer_start[-1]
+
+    def _crop_postings(self, crop_wanted: str):
+        """Ids of the names passing the substring test against crop_wanted, and a snapshot
+        (rows, length) of each of their posting arrays."""
+        with self._lock:
+            names = self._resolved.get(crop_wanted)
+            if names is None:
+                names = {c for c in self._postings if crop_wanted in c or c in crop_wanted}
+                self._resolved[crop_wanted] = names
+                if len(self._resolved) > self.memo_size:
+                    self._resolved.popitem(last=False)
+            else:
+                self._resolved.move_to_end(crop_wanted)
+            return {self._name_ids[c] for c in names}, [(self._postings[c], len(self._postings[c])) for c in names]
+
+    def candidate_rows(self, lat, lon, crop_wanted, max_distance_km):
+        name_ids, postings = self._crop_postings(crop_wanted)
+        with self._lock:
+            near = self._grid.query(lat, lon, max_distance_km)
+        offer_start = self._offer_start
+        if len(near) < sum(n for _, n in postings):
+            # Fewer sellers nearby than offers of this crop: walk the spatial hits
+            offer_name = self._offer_name
+            hits = (
+                (pos, [r - offer_start[pos] for r in range(offer_start[pos], offer_start[pos + 1])
+                       if offer_name[r] in name_ids])
+                for pos in near
+            )
+        else:
+            rows = heapq.merge(*(itertools.islice(p, n) for p, n in postings))
+            hits = (
+                (pos, [r - offer_start[pos] for r in group])
+                for pos, group in itertools.groupby(rows, key=self._offer_seller.__getitem__)
+            )
+        # Sellers the grid over-fetched are dropped before decoding; callers repeat the check
+        exact = _is_coord(lat, lon)
+        s_lat, s_lon = self._lat, self._lon
+        for pos, offer_positions in hits:
+            if not offer_positions or (exact and haversine_km(lat, lon, s_lat[pos], s_lon[pos]) > max_distance_km):
+                continue
+            yield pos, *self._decode(pos, offer_positions)
+
+    def _decode(self, pos, offer_positions):
+        """(seller, [(offer position, offer)]) for a candidate, decoding only the listed offers."""
+        if isinstance(self.sellers, RecordTable):
+            s = self.sellers.project(pos, SELLER_HEADER)
+            offers = self.sellers.items_at(pos, "crops", offer_positions)
+        else:
+            s = self.sellers[pos]
+            crops = _offers(s)
+            offers = [crops[j] for j in offer_positions]
+        return s, list(zip(offer_positions, offers))
+
+    def candidates(self, lat, lon, crop_wanted, max_distance_km):
+        for _, s, offers in self.candidate_rows(lat, lon, crop_wanted, max_distance_km):
+            yield s, [offer for _, offer in offers]
+
+
+def _buyer_terms(b: dict):
+    b_lat, b_lon = _location(b)
+    return (
+        b_lat,
+        b_lon,
+        str(b.get("crop_wanted") or "").strip().lower(),
+        _num(b.get("max_budget") or 1e9, 1e9),
+        _num(b.get("min_quality") or 0),
+    )
+
+
+def _make_match(b, s, offer, dist, qty, unit_price, quality, max_budget):
+    total = qty * unit_price
+    score = (10 - min(dist / 20, 10)) * 0.3 + (quality / 10) * 0.4 + (1 - min(total / max_budget, 1)) * 0.3
+    return {
+        "buyer_id": b.get("id"),
+        "seller_id": s.get("id"),
+        "seller_name": s.get("name", "Seller"),
+        "crop": offer.get("name"),
+        "quantity": qty,
+        "unit_price": unit_price,
+        "total_price": round(total, 2),
+        "quality_score": quality,
+        "distance_km": round(dist, 2),
+        "match_score": round(score, 2),
+    }
+
+
+def _iter_buyer_matches(b: dict, sellers, max_distance_km: float):
+    """Yield match dicts for one buyer, in seller/offer order. `sellers` is a list, SellerIndex or SellerCatalogue."""
+    b_lat, b_lon, crop_wanted, max_budget, min_quality = _buyer_terms(b)
+
+    if isinstance(sellers, SellerIndex):
+        pairs = sellers.candidates(b_lat, b_lon, crop_wanted, max_distance_km)
+    else:
+        pairs = ((s, _offers(s)) for s in sellers if isinstance(s, dict))
+    for s, offers in pairs:
+        s_lat, s_lon = _location(s)
+        dist = haversine_km(b_lat, b_lon, s_lat, s_lon)
+        if dist > max_distance_km:
+            continue
+        for offer in offers:
+            terms = _offer_terms(offer)
+            if terms is None:
+                continue
+            cname, qty, unit_price, quality = terms
+            if crop_wanted not in cname and cname not in crop_wanted:
+                continue
+            if quality < min_quality:
+                continue
+            if qty * unit_price > max_budget:
+                continue
+            yield _make_match(b, s, offer, dist, qty, unit_price, quality, max_budget)
+
+
+def _match_numpy(buyers: list, sellers: list, max_distance_km: float, chunk_cells: int) -> list:
+    """
+    Columnar engine: buyers and offers are packed into arrays and the distance, crop,
+    quality and budget filters run as one matrix per chunk of buyers (at most
+    `chunk_cells` buyer x offer cells at a time). Surviving pairs are re-checked with
+    the scalar haversine so output is identical to the Python engines.
+    """
+    import numpy as np
+
+    offers, crop_ids, vocab = [], [], {}
+    s_lat, s_lon, qty, price, quality = [], [], [], [], []
+    for s in sellers:
+        if not isinstance(s, dict):
+            continue
+        lat, lon = _location(s)
+        for offer in _offers(s):
+            terms = _offer_terms(offer)
+            if terms is None:
+                continue
+            offers.append((s, offer, lat, lon))
+            crop_ids.append(vocab.setdefault(terms[0], len(vocab)))
+            s_lat.append(lat)
+            s_lon.append(lon)
+            qty.append(terms[1])
+            price.append(terms[2])
+            quality.append(terms[3])
+    if not offers or not buyers:
+        return []
+
+    terms = [_buyer_terms(b) for b in buyers]
+    wanted_vocab = {}
+    wanted_ids = np.array([wanted_vocab.setdefault(t[2], len(wanted_vocab)) for t in terms])
+    # Substring crop test once per distinct (wanted, offered) name pair; expanded per chunk
+    crop_ok = np.array([[w in c or c in w for c in vocab] for w in wanted_vocab], dtype=bool)
+    crop_ids = np.array(crop_ids)
+
+    phi2 = np.radians(np.array(s_lat, dtype=float))
+    lam2 = np.array(s_lon, dtype=float)
+    cos_phi2 = np.cos(phi2)
+    total = np.array(qty) * np.array(price)
+    quality = np.array(quality)
+    b_lat = np.array([t[0] for t in terms], dtype=float)
+    b_lon = np.array([t[1] for t in terms], dtype=float)
+    max_budget = np.array([t[3] for t in terms])
+    min_quality = np.array([t[4] for t in terms])
+    # Slack so float differences vs math.* never drop a pair the scalar check would keep
+    dist_bound = max_distance_km + 1e-6 * max(1.0, abs(max_distance_km))
+
+    matches = []
+    rows = max(1, chunk_cells // len(offers))
+    for start in range(0, len(buyers), rows):
+        sl = slice(start, start + rows)
+        phi1 = np.radians(b_lat[sl])[:, None]
+        dphi = phi2[None, :] - phi1
+        dlam = np.radians(lam2[None, :] - b_lon[sl][:, None])
+        a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * cos_phi2[None, :] * np.sin(dlam / 2) ** 2
+        dist = EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+        keep = ~(dist > dist_bound)
+        keep &= crop_ok[wanted_ids[sl]][:, crop_ids]
+        keep &= ~(quality[None, :] < min_quality[sl][:, None])
+        keep &= ~(total[None, :] > max_budget[sl][:, None])
+        for i, j in zip(*np.nonzero(keep)):
+            bi = start + int(i)
+            b, (b_lat_i, b_lon_i, _, budget, _) = buyers[bi], terms[bi]
+            s, offer, lat, lon = offers[j]
+            d = haversine_km(b_lat_i, b_lon_i, lat, lon)
+            if d > max_distance_km:
+                continue
+            matches.append(_make_match(b, s, offer, d, qty[j], price[j], float(quality[j]), budget))
+    return matches
+
+
+def match_buyers_to_sellers(buyers: list, sellers, max_distance_km: float = 200, engine: str = "grid",
+                            chunk_cells: int = 1 << 20) -> list:
     """
     buyers: list of {id, crop_wanted, location: {lat, lon}, max_budget, min_quality}
-    sellers: list of {id, crops: [{name, quantity, unit_price, quality_score}], location: {lat, lon}}
+    sellers: list of {id, crops: [{name, quantity, unit_price, quality_score}], location: {lat, lon}},
+             or a prebuilt SellerIndex / SellerCatalogue over them
+    engine: "grid" visits only sellers in grid cells near each buyer; "scan" checks every seller;
+            "numpy" evaluates buyer x offer matrices in chunks of at most chunk_cells.
+            All engines return identical results.
     """
+    if engine == "numpy":
+        if isinstance(sellers, SellerIndex):
+            sellers = sellers.sellers
+        matches = _match_numpy(buyers, sellers, max_distance_km, chunk_cells)
+        return sorted(matches, key=lambda x: -x["match_score"])
+    if engine == "scan":
+        if isinstance(sellers, SellerIndex):
+            sellers = sellers.sellers
+    elif engine == "grid":
+        if not isinstance(sellers, SellerIndex) and buyers:
+            sellers = SellerIndex(sellers)
+    else:
+        raise ValueError(f"Unknown matching engine: {engine}")
+
     matches = []
     for b in buyers:
-        b_lat = b.get("location", {}).get("lat", 0)
-        b_lon = b.get("location", {}).get("lon", 0)
-        crop_wanted = (b.get("crop_wanted") or "").strip().lower()
-        max_budget = float(b.get("max_budget") or 1e9)
-        min_quality = float(b.get("min_quality") or 0)
+        matches.extend(_iter_buyer_matches(b, sellers, max_distance_km))
+    return sorted(matches, key=lambda x: -x["match_score"])
 
-        for s in sellers:
-            s_lat = s.get("location", {}).get("lat", 0)
-            s_lon = s.get("location", {}).get("lon", 0)
-            dist = haversine_km(b_lat, b_lon, s_lat, s_lon)
+
+def iter_top_matches(buyers: list, sellers, max_distance_km: float = 200, top_k: int = 5, start: int = 0):
+    """
+    Yield (buyer_position, matches) for buyers[start:], one buyer at a time.
+    Each buyer keeps only its best top_k matches in a bounded heap, ordered as
+    match_buyers_to_sellers would order that buyer's rows.
+    """
+    if not isinstance(sellers, SellerIndex):
+        sellers = SellerIndex(sellers)
+    for pos in range(start, len(buyers)):
+        heap = []
+        if top_k > 0:
+            for seq, m in enumerate(_iter_buyer_matches(buyers[pos], sellers, max_distance_km)):
+                item = (m["match_score"], -seq, m)
+                if len(heap) < top_k:
+                    heapq.heappush(heap, item)
+                elif item[:2] > heap[0][:2]:
+                    heapq.heapreplace(heap, item)
+        yield pos, [m for _, _, m in sorted(heap, key=lambda x: (-x[0], -x[1]))]
+
+
+def allocate(buyers: list, sellers, max_distance_km: float = 200, time_budget_s: float = None) -> dict:
+    """
+    Assign seller inventory across all buyers in one greedy pass, so an offer's quantity is
+    never promised twice. Candidate (buyer, offer) pairs pass the same crop, distance and
+    quality filters as match_buyers_to_sellers, except that an offer only has to be affordable
+    per unit. They are taken best match_score first, each time allocating as many whole units
+    as the offer's remaining stock, the buyer's remaining `quantity_wanted` (unbounded if
+    absent or null) and remaining `max_budget` allow. Fractional stock and quantities are
+    rounded down to whole units.
+
+    With `time_budget_s`, candidate generation and assignment stop when it runs out and the
+    result is marked incomplete. Returns {"allocations": [...], "solver": {time, counts}}.
+    """
+    t0 = time.perf_counter()
+    deadline = None if time_budget_s is None else t0 + time_budget_s
+    if not isinstance(sellers, SellerIndex):
+        sellers = SellerCatalogue(sellers, compact=False)
+    total_offers = sellers.offer_count()
+    pruned = {"index": 0, "crop": 0, "distance": 0, "quality": 0, "price": 0, "no_stock": 0}
+    edges = []
+    offer_left = {}
+    complete = True
+
+    considered = 0
+    for considered, b in enumerate(buyers):
+        if deadline is not None and time.perf_counter() > deadline:
+            complete = False
+            break
+        b_lat, b_lon, crop_wanted, max_budget, min_quality = _buyer_terms(b)
+        examined = 0
+        for s_pos, s, offers in sellers.candidate_rows(b_lat, b_lon, crop_wanted, max_distance_km):
+            examined += len(offers)
+            dist = haversine_km(b_lat, b_lon, *_location(s))
             if dist > max_distance_km:
+                pruned["distance"] += len(offers)
                 continue
-            for offer in s.get("crops", []):
-                cname = (offer.get("name") or "").strip().lower()
+            for j, offer in offers:
+                terms = _offer_terms(offer)
+                if terms is None:
+                    pruned["crop"] += 1
+                    continue
+                cname, qty, unit_price, quality = terms
                 if crop_wanted not in cname and cname not in crop_wanted:
+                    pruned["crop"] += 1
                     continue
-                qty = float(offer.get("quantity") or 0)
-                unit_price = float(offer.get("unit_price") or 0)
-                quality = float(offer.get("quality_score") or 0)
                 if quality < min_quality:
+                    pruned["quality"] += 1
                     continue
-                total = qty * unit_price
-                if total > max_budget:
+                if qty < 1:
+                    pruned["no_stock"] += 1
                     continue
-                score = (10 - min(dist / 20, 10)) * 0.3 + (quality / 10) * 0.4 + (1 - min(total / max_budget, 1)) * 0.3
-                matches.append({
-                    "buyer_id": b.get("id"),
-                    "seller_id": s.get("id"),
-                    "seller_name": s.get("name", "Seller"),
-                    "crop": offer.get("name"),
-                    "quantity": qty,
-                    "unit_price": unit_price,
-                    "total_price": round(total, 2),
-                    "quality_score": quality,
-                    "distance_km": round(dist, 2),
-                    "match_score": round(score, 2),
-                })
-    return sorted(matches, key=lambda x: -x["match_score"])
+                if unit_price > max_budget:
+                    pruned["price"] += 1
+                    continue
+                match = _make_match(b, s, offer, dist, qty, unit_price, quality, max_budget)
+                # Keyed by position: a compact catalogue decodes a fresh offer dict per buyer
+                offer_left[s_pos, j] = math.floor(qty)
+                edges.append((-match["match_score"], len(edges), considered, (s_pos, j), match))
+        pruned["index"] += total_offers - examined
+    else:
+        considered = len(buyers)
+
+    edges.sort(key=lambda e: e[:2])
+    want_left, budget_left = {}, {}
+    for pos in range(considered):
+        wanted = buyers[pos].get("quantity_wanted")
+        wanted = math.inf if wanted is None else _num(wanted, math.inf)
+        want_left[pos] = math.floor(wanted) if math.isfinite(wanted) else math.inf
+        budget_left[pos] = _buyer_terms(buyers[pos])[3]
+
+    allocations = []
+    for n, (_, _, pos, offer_key, match) in enumerate(edges):
+        if deadline is not None and n % 1024 == 0 and time.perf_counter() > deadline:
+            complete = False
+            break
+        unit_price = match["unit_price"]
+        affordable = math.floor(budget_left[pos] / unit_price + 1e-9) if unit_price > 0 else math.inf
+        qty = min(offer_left[offer_key], want_left[pos], affordable)
+        if qty <= 0:
+            continue
+        offer_left[offer_key] -= qty
+        want_left[pos] -= qty
+        budget_left[pos] -= qty * unit_price
+        allocations.append(dict(match, quantity=qty, total_price=round(qty * unit_price, 2)))
+
+    return {
+        "allocations": allocations,
+        "solver": {
+            "algorithm": "greedy",
+            "time_ms": round((time.perf_counter() - t0) * 1e3, 3),
+            "complete": complete,
+            "buyers_considered": considered,
+            "candidates": len(edges),
+            "pruned": pruned,
+        },
+    }
+
+
+class BuyerRequestIndex:
+    """
+    Standing buyer requests, indexed by location (grid) and normalized crop_wanted, so a
+    newly registered seller is scored only against the requests it can affect: those whose
+    radius may reach the seller and whose crop passes the substring test for an offer.
+    Each request may carry its own max_distance_km (default_distance_km otherwise); requests
+    are grouped into radius classes (within a factor of two) with a grid each, so one request
+    with a huge radius does not widen the query for all the others.
+    """
+
+    def __init__(self, requests=(), cell_deg: float = 1.0, default_distance_km: float = 200):
+        self.requests = []
+        self.default_distance_km = default_distance_km
+        self.cell_deg = cell_deg
+        self._classes = {}  # radius class -> [grid, request positions, largest radius in the class]
+        self._by_crop = {}
+        self._lock = threading.Lock()
+        for r in requests:
+            self.add(r)
+
+    def __len__(self):
+        return len(self.requests)
+
+    def radius(self, r: dict) -> float:
+        """The request's max_distance_km; only a missing or null one means default_distance_km."""
+        value = r.get("max_distance_km")
+        return self.default_distance_km if value is None else _num(value, self.default_distance_km)
+
+    def add(self, request: dict):
+        b_lat, b_lon, crop_wanted, _, _ = _buyer_terms(request)
+        radius = self.radius(request)
+        cls = math.frexp(radius)[1] if radius > 0 else None
+        with self._lock:
+            pos = len(self.requests)
+            self.requests.append(request)
+            self._by_crop.setdefault(crop_wanted, []).append(pos)
+            entry = self._classes.get(cls)
+            if entry is None:
+                entry = self._classes[cls] = [GeoGridIndex(self.cell_deg), [], radius]
+            entry[0].add(b_lat, b_lon)
+            entry[1].append(pos)
+            entry[2] = max(entry[2], radius)
+
+    def affected(self, seller: dict) -> list:
+        """Requests that may match one of the seller's offers, in registration order."""
+        names = {_offer_name(o) for o in _offers(seller) if isinstance(o, dict)}
+        if not names:
+            return []
+        lat, lon = _location(seller)
+        with self._lock:
+            crops = [c for c in self._by_crop if any(c in n or n in c for n in names)]
+            by_crop = sorted(itertools.chain.from_iterable(self._by_crop[c] for c in crops))
+            if not by_crop:
+                return []
+            near = sorted(itertools.chain.from_iterable(
+                (positions[i] for i in grid.query(lat, lon, radius))
+                for grid, positions, radius in self._classes.values()
+            ))
+            # Intersect the smaller posting list against the larger one
+            small, large = (near, by_crop) if len(near) < len(by_crop) else (by_crop, near)
+            large = set(large)
+            return [self.requests[i] for i in small if i in large]
+
+    def match_seller(self, seller: dict) -> list:
+        """(request, matches) for every standing request the new seller matches, best match first."""
+        hits = []
+        for r in self.affected(seller):
+            # Matches are reported for the buyer, not for the request's own id
+            buyer = {**r, "id": r.get("buyer_id")}
+            matches = sorted(_iter_buyer_matches(buyer, [seller], self.radius(r)), key=lambda m: -m["match_score"])
+            if matches:
+                hits.append((r, matches))
+        return hits
+
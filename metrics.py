@@ -0,0 +1,183 @@
+"""
+Per-route request metrics (latency and payload-size histograms, status counts, in-flight
+requests) rendered in the Prometheus text format, and an opt-in cProfile hook that
+profiles the next N requests of one route. Counters are per process; scrape each worker.
+"""
+import io
+import threading
+import time
+
+from flask import g, request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        out, running = [], 0
+        for le, n in zip(list(self.buckets) + ["+Inf"], self.counts):
+            running += n
+            out.append(f'{name}_bucket{{{labels},le="{le}"}} {running}')
+        out.append(f"{name}_sum{{{labels}}} {self.total:.6f}")
+        out.append(f"{name}_count{{{labels}}} {self.count}")
+        return out
+
+
+def _label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RequestMetrics:
+    def __init__(self):
+        self._latency = {}  # (route, method) -> Histogram
+        self._req_size = {}
+        self._resp_size = {}
+        self._status = {}  # (route, method, status) -> count
+        self._in_flight = {}  # (route, method) -> count
+        self._lock = threading.Lock()
+
+    def started(self, key):
+        with self._lock:
+            self._in_flight[key] = self._in_flight.get(key, 0) + 1
+
+    def finished(self, key, status, seconds, request_bytes, response_bytes):
+        with self._lock:
+            self._in_flight[key] -= 1
+            self._status[key + (status,)] = self._status.get(key + (status,), 0) + 1
+            self._hist(self._latency, key, LATENCY_BUCKETS).observe(seconds)
+            self._hist(self._req_size, key, SIZE_BUCKETS).observe(request_bytes)
+            if response_bytes is not None:  # unknown for streamed responses
+                self._hist(self._resp_size, key, SIZE_BUCKETS).observe(response_bytes)
+
+    @staticmethod
+    def _hist(table, key, buckets):
+        h = table.get(key)
+        if h is None:
+            h = table[key] = Histogram(buckets)
+        return h
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            lines = [
+                "# HELP agri_http_requests_total Requests handled, by route, method and status.",
+                "# TYPE agri_http_requests_total counter",
+            ]
+            for (route, method, status), n in sorted(self._status.items()):
+                lines.append(f'agri_http_requests_total{{route="{_label(route)}",method="{method}",status="{status}"}} {n}')
+            lines += [
+                "# HELP agri_http_requests_in_flight Requests currently being handled.",
+                "# TYPE agri_http_requests_in_flight gauge",
+            ]
+            for (route, method), n in sorted(self._in_flight.items()):
+                lines.append(f'agri_http_requests_in_flight{{route="{_label(route)}",method="{method}"}} {n}')
+            for name, kind, table in (
+                ("agri_http_request_duration_seconds", "Request latency", self._latency),
+                ("agri_http_request_size_bytes", "Request body size", self._req_size),
+                ("agri_http_response_size_bytes", "Response body size (non-streamed)", self._resp_size),
+            ):
+                lines += [f"# HELP {name} {kind}, by route and method.", f"# TYPE {name} histogram"]
+                for (route, method), h in sorted(table.items()):
+                    lines += h.lines(name, f'route="{_label(route)}",method="{method}"')
+        return "\n".join(lines) + "\n"
+
+
+class RouteProfiler:
+    """
+    Profiles the next `requests` requests of an armed route with cProfile and accumulates
+    their stats. Only one request is profiled at a time; concurrent ones run unprofiled.
+    """
+
+    def __init__(self):
+        self._armed = {}  # route -> requests left to profile
+        self._stats = {}  # route -> pstats.Stats
+        self._active = threading.Lock()
+        self._lock = threading.Lock()
+
+    def arm(self, route: str, requests: int = 10):
+        with self._lock:
+            self._armed[route] = requests
+            self._stats.pop(route, None)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {"armed": dict(self._armed), "profiled": sorted(self._stats)}
+
+    def start(self, route: str):
+        with self._lock:
+            if self._armed.get(route, 0) <= 0 or not self._active.acquire(blocking=False):
+                return None
+            self._armed[route] -= 1
+            if not self._armed[route]:
+                del self._armed[route]
+        import cProfile  # only once a route is armed
+        prof = cProfile.Profile()
+        prof.enable()
+        return prof
+
+    def stop(self, route: str, prof):
+        prof.disable()
+        self._active.release()
+        with self._lock:
+            if route in self._stats:
+                self._stats[route].add(prof)
+            else:
+                import pstats
+                self._stats[route] = pstats.Stats(prof)
+
+    def report(self, route: str, sort: str = "cumulative", limit: int = 40):
+        """Top `limit` functions for `route` as pstats text, or None if nothing was profiled."""
+        with self._lock:
+            stats = self._stats.get(route)
+            if stats is None:
+                return None
+            out = io.StringIO()
+            stats.stream = out
+            stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+
+def init_app(app, metrics: RequestMetrics, profiler: RouteProfiler = None):
+    """Time every request of `app`. Register before other before_request hooks so they are included."""
+
+    @app.before_request
+    def _start_request_metrics():
+        rule = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        g.metrics_key = (rule, request.method)
+        g.metrics_start = time.perf_counter()
+        metrics.started(g.metrics_key)
+        if profiler is not None:
+            g.profile = profiler.start(rule)
+
+    @app.after_request
+    def _note_response(response):
+        g.metrics_status = response.status_code
+        g.metrics_size = None if response.is_streamed else response.content_length
+        return response
+
+    @app.teardown_request
+    def _finish_request_metrics(exc):
+        key = g.pop("metrics_key", None)
+        if key is None:
+            return
+        prof = g.pop("profile", None)
+        if prof is not None:
+            profiler.stop(key[0], prof)
+        status = 500 if exc is not None else g.get("metrics_status", 500)
+        metrics.finished(key, status, time.perf_counter() - g.metrics_start,
+                         request.content_length or 0, g.get("metrics_size"))
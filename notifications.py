@@ -0,0 +1,92 @@
+"""
+Notification inboxes indexed by recipient (e.g. seller_id). Notifications live in one
+compact RecordTable (see backend/compact.py) in arrival order; each is numbered by a global
+sequence number, which doubles as the pagination cursor. An inbox is just the sorted array
+of its recipient's sequence numbers. Long-poll waiters sleep on their own recipient's
+condition and are woken only by it.
+"""
+import threading
+import time
+from array import array
+from bisect import bisect_right
+
+from backend.compact import RecordTable
+
+# Record layouts for the two inboxes the app keeps
+BUYER_INTEREST_SCHEMA = {
+    "id": "id", "seller_id": "str", "buyer_id": "str", "buyer_name": "str", "crop": "str",
+    "quantity": "str", "message": "str", "read": "bool", "seq": "num",
+}
+MATCH_SCHEMA = {
+    "buyer_id": "str", "seller_id": "str", "seller_name": "str", "crop": "str", "quantity": "num",
+    "unit_price": "num", "total_price": "num", "quality_score": "num", "distance_km": "num", "match_score": "num",
+}
+BUYER_ALERT_SCHEMA = {
+    "id": "id", "buyer_id": "str", "request_id": "id", "seller_id": "str", "seller_name": "str",
+    "matches": MATCH_SCHEMA, "read": "bool", "seq": "num",
+}
+
+
+class NotificationStore:
+    def __init__(self, key: str = "seller_id", schema: dict = None):
+        self.key = key
+        # every notification, in arrival order; row i has seq i + 1
+        self.items = RecordTable(schema or {key: "str", "seq": "num"})
+        self._inboxes = {}  # recipient -> array of seq
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._conds = {}  # recipient -> [condition, number of waiters], only while someone waits
+
+    def add(self, n: dict) -> dict:
+        with self._lock:
+            self._seq += 1
+            n["seq"] = self._seq
+            self.items.append(n)
+            rid = n.get(self.key)
+            if rid is not None and not isinstance(rid, str):
+                rid = str(rid)  # inboxes are keyed by string ids; odd legacy values still get one
+            inbox = self._inboxes.get(rid)
+            if inbox is None:
+                inbox = self._inboxes[rid] = array("q")
+            inbox.append(self._seq)
+            waiting = self._conds.get(rid)
+            if waiting is not None:
+                waiting[0].notify_all()
+        return n
+
+    def _after(self, recipient, since: int, limit: int = None) -> list:
+        # Both the table and inboxes are ordered by seq, so the start is found by position
+        if recipient is None:
+            seqs = range(max(since, 0) + 1, self._seq + 1)
+        else:
+            inbox = self._inboxes.get(recipient, ())
+            seqs = inbox[bisect_right(inbox, since):]
+        if limit:
+            seqs = seqs[:limit]
+        return [self.items[seq - 1] for seq in seqs]
+
+    def list(self, recipient=None, since: int = 0, limit: int = None) -> list:
+        """Notifications with seq > since (oldest first), for one recipient or everyone."""
+        with self._lock:
+            return self._after(recipient, since, limit)
+
+    def wait(self, recipient, since: int = 0, timeout: float = 25, limit: int = None) -> list:
+        """Long-poll: return as soon as the recipient has notifications past `since`, or [] on timeout."""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            waiting = self._conds.get(recipient)
+            if waiting is None:
+                waiting = self._conds[recipient] = [threading.Condition(self._lock), 0]
+            waiting[1] += 1
+            try:
+                while True:
+                    items = self._after(recipient, since, limit)
+                    remaining = deadline - time.monotonic()
+                    if items or remaining <= 0:
+                        return items
+                    waiting[0].wait(remaining)
+            finally:
+                # Drop the condition with its last waiter, so polled ids do not pile up
+                waiting[1] -= 1
+                if not waiting[1]:
+                    del self._conds[recipient]
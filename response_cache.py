@@ -0,0 +1,143 @@
+"""
+Response cache for pure endpoints: serialized response bodies keyed by route and normalized
+request inputs. Lookups go to a bounded in-process TTL+LRU tier first, then to an optional
+shared tier (a local SQLite file standing in for e.g. Redis) that every worker on the host
+fills; shared hits are copied into the local tier. Hits and misses are counted per route.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Bounded LRU whose entries also expire `ttl` seconds after they were stored."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteTier:
+    """Shared cache tier in a local SQLite file (WAL), keyed by string, storing bytes."""
+
+    PURGE_EVERY = 256  # puts between deletions of expired rows
+
+    def __init__(self, path: str, ttl: float = 300):
+        self.ttl = ttl
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")  # a cache: losing it on power loss is fine
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+        self._puts = 0
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM response_cache WHERE key = ? AND expires > ?", (key, time.time())
+            ).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def put(self, key: str, value: bytes):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires) VALUES (?, ?, ?)",
+                (key, value, time.time() + self.ttl),
+            )
+            self._puts += 1
+            if self._puts % self.PURGE_EVERY == 0:
+                self._conn.execute("DELETE FROM response_cache WHERE expires <= ?", (time.time(),))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM response_cache")
+
+
+class ResponseCache:
+    def __init__(self, local: TTLCache, shared: SQLiteTier = None):
+        self.local = local
+        self.shared = shared
+        self._counts = {}  # route -> {"local": n, "shared": n, "miss": n}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, route: str, key: tuple, compute):
+        """Cached bytes for (route, key), or compute() stored in both tiers.
+        Returns (body, source) with source "local", "shared" or "miss"."""
+        body, source = self.local.get((route, key)), "local"
+        if body is None and self.shared is not None:
+            shared_key = json.dumps([route, *key])
+            body, source = self.shared.get(shared_key), "shared"
+            if body is not None:
+                self.local.put((route, key), body)
+        if body is None:
+            body, source = compute(), "miss"
+            self.local.put((route, key), body)
+            if self.shared is not None:
+                self.shared.put(shared_key, body)
+        with self._lock:
+            counts = self._counts.setdefault(route, {"local": 0, "shared": 0, "miss": 0})
+            counts[source] += 1
+        return body, source
+
+    def clear(self):
+        self.local.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            routes = {
+                route: dict(c, hit_rate=round((c["local"] + c["shared"]) / max(1, sum(c.values())), 4))
+                for route, c in self._counts.items()
+            }
+        return {
+            "entries": len(self.local),
+            "max_entries": self.local.max_entries,
+            "ttl_seconds": self.local.ttl,
+            "shared": self.shared is not None,
+            "routes": routes,
+        }
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# HELP agri_response_cache_lookups_total Response cache lookups by route and result.",
+            "# TYPE agri_response_cache_lookups_total counter",
+        ]
+        with self._lock:
+            for route, counts in sorted(self._counts.items()):
+                for result, n in counts.items():
+                    lines.append(f'agri_response_cache_lookups_total{{route="{route}",result="{result}"}} {n}')
+        return "\n".join(lines) + "\n"
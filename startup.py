@@ -0,0 +1,79 @@
+"""
+Cold-start report: which imports and startup steps dominate the time to a ready app.
+Run: python app.py --startup-report [--features market,crops] [--top 20]
+
+The app is started in a fresh interpreter with -X importtime; the per-module timings are
+parsed and summarised by module (self and cumulative) and by top-level package, together
+with the time spent importing app.py and building the app with create_app().
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from backend.config import BASE_DIR
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+_CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+app.create_app({features})
+t2 = time.perf_counter()
+print(json.dumps({{"import_app_ms": (t1 - t0) * 1e3, "create_app_ms": (t2 - t1) * 1e3}}))
+"""
+
+
+def parse_importtime(stderr: str) -> list:
+    """[(module, self_us, cumulative_us, depth)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), (len(m.group(3)) - 1) // 2))
+    return rows
+
+
+def measure_startup(features=None) -> dict:
+    """Start the app in a subprocess; returns phase timings and the parsed import rows."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD.format(features=repr(features))],
+        cwd=BASE_DIR, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "startup failed")
+    phases = json.loads(proc.stdout.strip().splitlines()[-1])
+    return dict(phases, imports=parse_importtime(proc.stderr))
+
+
+def print_startup_report(argv=None):
+    ap = argparse.ArgumentParser(prog="app.py --startup-report", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--startup-report", action="store_true", help=argparse.SUPPRESS)
+    ap.add_argument("--features", help="comma-separated feature blueprints (default: all)")
+    ap.add_argument("--top", type=int, default=20)
+    args = ap.parse_args(sys.argv[1:] if argv is None else argv)
+    features = [f.strip() for f in args.features.split(",") if f.strip()] if args.features else None
+
+    report = measure_startup(features)
+    rows = report["imports"]
+    print(f"features: {', '.join(features) if features else 'all'}")
+    print(f"import app:   {report['import_app_ms']:8.1f} ms")
+    print(f"create_app(): {report['create_app_ms']:8.1f} ms")
+    print(f"modules imported: {len(rows)}, self time total {sum(r[1] for r in rows) / 1e3:.1f} ms")
+
+    by_package = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        root = name.split(".")[0]
+        by_package["backend." + name.split(".")[1] if root == "backend" and "." in name else root] += self_us
+    print(f"\n{'package':<36} {'self ms':>9}")
+    for name, us in sorted(by_package.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"{name:<36} {us / 1e3:>9.1f}")
+
+    print(f"\n{'module (by cumulative)':<36} {'cumul ms':>9} {'self ms':>9}")
+    for name, self_us, cum_us, depth in sorted(rows, key=lambda r: -r[2])[:args.top]:
+        print(f"{'  ' * min(depth, 4) + name:<36} {cum_us / 1e3:>9.1f} {self_us / 1e3:>9.1f}")
@@ -0,0 +1,318 @@
+"""
+Pluggable append-only record log for app state (sellers, surveys, notifications, deliveries).
+
+Every write is a record (table, key, JSON document) appended to a log with increasing ids.
+Each process keeps its in-memory indexes current by replaying the records past the last id
+it has applied (RecordStore.sync), which is also how several workers sharing one SQLite
+file see each other's writes. Keyed tables keep only their newest record per key once
+compacted, so a restart replays little more than the live state.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class StorageError(Exception):
+    """A batch of records could not be committed."""
+
+
+class MemoryLog:
+    """Process-local backend: nothing survives a restart (demo / single worker)."""
+
+    def __init__(self):
+        self._records = []
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # serializes writers; readers only need _lock
+
+    def append_many(self, records):
+        with self._write_lock:
+            self._append(records)
+
+    def _append(self, records):
+        rows = [(table, key, json.dumps(doc)) for table, key, doc in records]
+        with self._lock:
+            for table, key, doc in rows:
+                self._records.append((self._next_id, table, key, doc))
+                self._next_id += 1
+
+    @contextmanager
+    def exclusive(self):
+        """Block every other writer; yields append(records), committed when the block exits
+        (nothing is written if it raises)."""
+        staged = []
+        with self._write_lock:
+            yield staged.extend
+            self._append(staged)
+
+    def read_since(self, last_id: int, limit: int = 5000, tables=None) -> list:
+        """(id, table, key, doc) after last_id; with `tables`, docs of other tables are not decoded (None)."""
+        with self._lock:
+            # ids are dense until compaction, so start from a binary search
+            lo, hi = 0, len(self._records)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self._records[mid][0] <= last_id:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            rows = self._records[lo:lo + limit]
+        return [(rid, t, k, json.loads(d) if tables is None or t in tables else None) for rid, t, k, d in rows]
+
+    def compact(self, keyed_tables):
+        with self._lock:
+            newest = {}
+            for rid, t, k, _ in self._records:
+                if t in keyed_tables:
+                    newest[(t, k)] = rid
+            self._records = [r for r in self._records if r[1] not in keyed_tables or newest[(r[1], r[2])] == r[0]]
+
+    def close(self):
+        pass
+
+
+class SQLiteLog:
+    """
+    SQLite backend in WAL mode, safe to share between worker processes on one host.
+    Writes are group-committed: appends that arrive while a commit is in flight are
+    queued, and the next leader commits all of them in a single transaction.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS records ("
+        " id INTEGER PRIMARY KEY AUTOINCREMENT, tbl TEXT NOT NULL, key TEXT, doc TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS records_tbl_key ON records (tbl, key)",
+    )
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._writer = self._connect()
+        for stmt in self.SCHEMA:
+            self._writer.execute(stmt)
+        self._writer.commit()
+        self._reader = self._connect()
+        self._read_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._pending = []
+        self._batch = 1      # batch currently accepting records
+        self._flushed = 0    # last batch committed (or failed)
+        self._failed = {}
+        self._leader = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def append_many(self, records):
+        rows = [(table, key, json.dumps(doc)) for table, key, doc in records]
+        with self._cond:
+            self._pending.extend(rows)
+            mine = self._batch
+            while self._flushed < mine:
+                if self._leader:
+                    self._cond.wait()
+                    continue
+                self._leader = True
+                batch, number = self._pending, self._batch
+                self._pending, self._batch = [], self._batch + 1
+                self._cond.release()
+                try:
+                    error = self._commit(batch)
+                finally:
+                    self._cond.acquire()
+                if error is not None:
+                    self._failed[number] = error
+                self._flushed = number
+                self._leader = False
+                self._cond.notify_all()
+            error = self._failed.pop(mine, None)
+        if error is not None:
+            raise StorageError(str(error)) from error
+
+    @contextmanager
+    def _leadership(self):
+        """Act as the group-commit leader: no other append in this process commits meanwhile."""
+        with self._cond:
+            while self._leader:
+                self._cond.wait()
+            self._leader = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._leader = False
+                self._cond.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        """
+        Block every other writer, in this process and (through SQLite's write lock) in any
+        other, for a read-modify-write. Yields append(records); they are committed in the same
+        transaction when the block exits, or rolled back if it raises.
+        """
+        rows = []
+        with self._leadership():
+            try:
+                self._writer.execute("BEGIN IMMEDIATE")
+            except sqlite3.Error as e:
+                raise StorageError(str(e)) from e
+            try:
+                yield lambda records: rows.extend((t, k, json.dumps(d)) for t, k, d in records)
+                self._writer.executemany("INSERT INTO records (tbl, key, doc) VALUES (?, ?, ?)", rows)
+                self._writer.execute("COMMIT")
+            except BaseException as e:
+                if self._writer.in_transaction:
+                    self._writer.execute("ROLLBACK")
+                if isinstance(e, sqlite3.Error):
+                    raise StorageError(str(e)) from e
+                raise
+
+    def _commit(self, rows):
+        try:
+            self._writer.execute("BEGIN IMMEDIATE")
+            self._writer.executemany("INSERT INTO records (tbl, key, doc) VALUES (?, ?, ?)", rows)
+            self._writer.execute("COMMIT")
+        except sqlite3.Error as e:
+            if self._writer.in_transaction:
+                self._writer.execute("ROLLBACK")
+            return e
+        return None
+
+    def read_since(self, last_id: int, limit: int = 5000, tables=None) -> list:
+        """(id, table, key, doc) after last_id; with `tables`, docs of other tables are neither
+        fetched nor decoded (None), so skipping them costs little."""
+        if tables is None:
+            sql, args = "SELECT id, tbl, key, doc FROM records WHERE id > ? ORDER BY id LIMIT ?", (last_id, limit)
+        elif tables:
+            marks = ",".join("?" * len(tables))
+            sql = f"SELECT id, tbl, key, CASE WHEN tbl IN ({marks}) THEN doc END FROM records WHERE id > ? ORDER BY id LIMIT ?"
+            args = (*tables, last_id, limit)
+        else:
+            sql, args = "SELECT id, tbl, key, NULL FROM records WHERE id > ? ORDER BY id LIMIT ?", (last_id, limit)
+        with self._read_lock:
+            rows = self._reader.execute(sql, args).fetchall()
+        return [(rid, t, k, None if d is None else json.loads(d)) for rid, t, k, d in rows]
+
+    def compact(self, keyed_tables):
+        """Drop superseded records of keyed tables and checkpoint the WAL."""
+        if not keyed_tables:
+            return
+        marks = ",".join("?" * len(keyed_tables))
+        with self._leadership():
+            self._writer.execute("BEGIN IMMEDIATE")
+            self._writer.execute(
+                f"DELETE FROM records WHERE tbl IN ({marks}) AND id NOT IN"
+                f" (SELECT MAX(id) FROM records WHERE tbl IN ({marks}) GROUP BY tbl, key)",
+                tuple(keyed_tables) * 2,
+            )
+            self._writer.execute("COMMIT")
+            self._writer.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        self._writer.close()
+        self._reader.close()
+
+
+def open_log(backend: str, path: str = None):
+    if backend == "memory":
+        return MemoryLog()
+    if backend == "sqlite":
+        return SQLiteLog(path)
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+class RecordStore:
+    """
+    Applies log records to in-memory state. `appliers` maps table name to fn(key, doc); records
+    of other tables are skipped without being decoded (see attach() to add tables later).
+    Tables listed in `keyed` are upserts by key and are compacted every `compact_every` writes.
+    A record whose applier fails is logged and kept in `failed` (the last 100) and replay moves
+    past it, so one bad record cannot block every later one.
+    """
+
+    def __init__(self, log, appliers: dict, keyed=(), compact_every: int = 1000):
+        self.log = log
+        self.appliers = appliers
+        self.keyed = tuple(keyed)
+        self.compact_every = compact_every
+        self.last_id = 0
+        self._writes_since_compact = 0
+        self.failed = deque(maxlen=100)  # (record id, table, key, error) of records that failed to apply
+        self._lock = threading.Lock()
+
+    def write(self, table: str, doc: dict, key: str = None):
+        self.write_many([(table, key, doc)])
+
+    def write_many(self, records):
+        """Commit records atomically (one transaction), then bring this process up to date."""
+        records = list(records)
+        self.log.append_many(records)
+        self.sync()
+        self._maybe_compact(records)
+
+    def write_planned(self, plan):
+        """
+        Isolated read-modify-write. With every other writer (any process) blocked, bring this
+        process up to date, then call plan() -> (records, result) against that state and commit
+        its records in one transaction. Returns `result`.
+        """
+        with self.log.exclusive() as append:
+            self.sync()
+            records, result = plan()
+            records = list(records)
+            append(records)
+        self.sync()
+        self._maybe_compact(records)
+        return result
+
+    def _maybe_compact(self, records):
+        keyed_writes = sum(1 for t, _, _ in records if t in self.keyed)
+        if keyed_writes:
+            with self._lock:
+                self._writes_since_compact += keyed_writes
+                due = self._writes_since_compact >= self.compact_every
+                if due:
+                    self._writes_since_compact = 0
+            if due:
+                self.log.compact(self.keyed)
+
+    def sync(self):
+        """Apply every record committed (by any process) since the last sync."""
+        with self._lock:
+            self.last_id = self._replay(self.appliers, self.last_id)
+
+    def attach(self, appliers: dict):
+        """Add tables to an open store, replaying their records up to the last sync."""
+        new = {t: fn for t, fn in appliers.items() if t not in self.appliers}
+        if not new:
+            return
+        with self._lock:
+            self._replay(new, 0, self.last_id)
+            self.appliers = {**self.appliers, **new}
+
+    def _replay(self, appliers: dict, since: int, until: int = None) -> int:
+        """Apply the records of `appliers`' tables with since < id (<= until); returns the last id read."""
+        tables = tuple(appliers)
+        while True:
+            batch = self.log.read_since(since, tables=tables)
+            for rid, table, key, doc in batch:
+                if until is not None and rid > until:
+                    return since
+                if table in appliers:
+                    try:
+                        appliers[table](key, doc)
+                    except Exception as e:
+                        logger.exception("Skipping log record %s (table %r, key %r)", rid, table, key)
+                        self.failed.append((rid, table, key, repr(e)))
+                since = rid
+            if len(batch) < 5000:
+                return since
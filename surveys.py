@@ -0,0 +1,111 @@
+"""
+Survey submissions with aggregates kept up to date on every add: submissions per role and
+answer counts per question (overall and per role), so stats never rescan the list.
+Exports are streamed row by row over a snapshot of the submissions.
+"""
+import csv
+import io
+import json
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+
+
+def parse_time(value):
+    """ISO-8601 string -> epoch seconds (naive times are taken as UTC), None if unparseable."""
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _answer_key(answer) -> str:
+    if isinstance(answer, str):
+        return answer
+    return json.dumps(answer, sort_keys=True)
+
+
+class SurveyStore:
+    def __init__(self):
+        self.items = []  # every submission, in arrival order
+        self._times = []  # parsed timestamp per submission
+        self._by_role = {}  # role -> positions in items
+        self._roles = Counter()
+        self._answers = {None: {}}  # role (None = all) -> question -> Counter(answer)
+        self._lock = threading.Lock()
+
+    def add(self, survey: dict) -> dict:
+        role = survey.get("role")
+        if role is not None and not isinstance(role, str):
+            role = str(role)  # aggregates are keyed by role; odd legacy values are counted as text
+        responses = survey.get("responses")
+        with self._lock:
+            self._by_role.setdefault(role, []).append(len(self.items))
+            self.items.append(survey)
+            self._times.append(parse_time(survey.get("timestamp")))
+            self._roles[role] += 1
+            if isinstance(responses, dict):
+                for scope in ((None,) if role is None else (None, role)):
+                    questions = self._answers.setdefault(scope, {})
+                    for q, a in responses.items():
+                        questions.setdefault(q, Counter())[_answer_key(a)] += 1
+        return survey
+
+    def stats(self, role=None) -> dict:
+        """Counts per role and, for `role` (or everyone), per question and answer."""
+        with self._lock:
+            questions = self._answers.get(role, {})
+            return {
+                "total": len(self.items) if role is None else self._roles.get(role, 0),
+                "roles": {str(r): n for r, n in self._roles.items()},
+                "questions": {q: dict(c) for q, c in questions.items()},
+            }
+
+    def questions(self, role=None) -> list:
+        with self._lock:
+            return sorted(self._answers.get(role, {}))
+
+    def iter(self, role=None, since: float = None, until: float = None):
+        """Yield submissions (oldest first) matching the filters; times are epoch seconds and
+        submissions without a parseable timestamp are skipped when a time filter is set."""
+        with self._lock:
+            # Both lists are append-only, so their current lengths are a stable snapshot
+            positions = None if role is None else self._by_role.get(role, [])
+            count = len(self.items) if positions is None else len(positions)
+        for n in range(count):
+            i = n if positions is None else positions[n]
+            if since is not None or until is not None:
+                t = self._times[i]
+                if t is None or (since is not None and t < since) or (until is not None and t >= until):
+                    continue
+            yield self.items[i]
+
+    def iter_ndjson(self, role=None, since: float = None, until: float = None):
+        for survey in self.iter(role, since, until):
+            yield json.dumps(survey) + "\n"
+
+    def iter_csv(self, role=None, since: float = None, until: float = None):
+        """CSV with one column per question seen (for the role), answers JSON-encoded if not strings."""
+        questions = self.questions(role)
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+
+        def line(row):
+            writer.writerow(row)
+            out = buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+            return out
+
+        yield line(["id", "role", "timestamp"] + questions)
+        for survey in self.iter(role, since, until):
+            responses = survey.get("responses")
+            if not isinstance(responses, dict):
+                responses = {}
+            yield line([survey.get("id"), survey.get("role"), survey.get("timestamp")]
+                       + [_answer_key(responses[q]) if q in responses else "" for q in questions])